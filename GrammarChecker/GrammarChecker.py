@@ -1,13 +1,80 @@
-from .POSTagger_HMC import POSTagger, load_data
+import hashlib
+import json
+import os
+from collections import Counter
+
+from .POSTagger_HMC import POSTagger, StaleSnapshotError, training_data_hash
+from .corpus_loader import DEFAULT_DATASET, load_corpus
+from .grammar_rules import DEFAULT_GRAMMAR_RULES, RuleIndex
+from .sentence_cache import SentenceCache
 from tqdm import tqdm
 
 
 class GrammarChecker:
-    def __init__(self, pos_tagger_dataset_location: str):
-        self.sentences, self.tags = load_data(pos_tagger_dataset_location)
+    def __init__(self, pos_tagger_dataset_location: str = None, snapshot_path: str = None,
+                 corpus_cache_dir: str = None, workers: int = 1, cascade: bool = False, pos_tagger=None,
+                 rules=DEFAULT_GRAMMAR_RULES, sentence_cache_size: int = 10000):
+        """
+        Args:
+            pos_tagger_dataset_location (str): Tagged corpus the POS tagger is trained on.
+            snapshot_path (str): POS tagger snapshot directory. It is loaded when present and trained on the
+                current corpus, otherwise the tagger is trained and saved there. Without a corpus the
+                snapshot is loaded without checking it.
+            corpus_cache_dir (str): Directory caching the parsed corpus as integer id arrays, rebuilt when the
+                corpus changes.
+            workers (int): Number of processes parsing the corpus when it is not cached.
+            cascade (bool): Tag the words seen with a single tag from a lexicon and run the HMM only over the
+                other words.
+            pos_tagger: Trained tagger with a predict_batch method, such as XLMRPOSTagger. It is used as is
+                instead of the HMM tagger.
+            rules: (trigger word, target tags, required suffix) grammar rules, see DEFAULT_GRAMMAR_RULES.
+            sentence_cache_size (int): Number of sentences whose results are cached, 0 disables the cache.
+        """
+        self.rule_index = RuleIndex(rules)
+        rules_json = json.dumps(self.rule_index.rules, ensure_ascii=False)
+        self.rules_hash = hashlib.sha1(rules_json.encode('utf-8')).hexdigest()
+        self.sentence_cache = SentenceCache(sentence_cache_size)
+
+        # Counts of the checked sentences and of the ones that needed no POS tags
+        self.stats = Counter()
+
+        if pos_tagger is not None:
+            self.sentences, self.tags = [], []
+            self.pos_tagger = pos_tagger
+            return
+
+        if pos_tagger_dataset_location is None and snapshot_path is None:
+            raise ValueError("A tagged dataset, a POS tagger snapshot or a POS tagger is required")
+
+        self.sentences, self.tags = [], []
+        statistics = None
+        if pos_tagger_dataset_location is not None:
+            corpus = load_corpus(pos_tagger_dataset_location, workers, corpus_cache_dir)
+            self.sentences, self.tags, statistics = corpus.sentences, corpus.tags, corpus.statistics
+
+        if snapshot_path is not None and os.path.exists(os.path.join(snapshot_path, "meta.json")):
+            data_hash = training_data_hash(self.sentences, self.tags) if pos_tagger_dataset_location else None
+            try:
+                self.pos_tagger = POSTagger.load(snapshot_path, data_hash)
+                self._set_cascade(cascade)
+                return
+            except StaleSnapshotError:
+                # The corpus changed since the snapshot was saved or it has an older format, retrain and replace it
+                if pos_tagger_dataset_location is None:
+                    raise
+        elif pos_tagger_dataset_location is None:
+            raise FileNotFoundError(f"No POS tagger snapshot at {snapshot_path}")
 
         self.pos_tagger = POSTagger()
-        self.pos_tagger.train(self.sentences, self.tags)
+        self.pos_tagger.train(self.sentences, self.tags, statistics)
+
+        if snapshot_path is not None:
+            self.pos_tagger.save(snapshot_path)
+        self._set_cascade(cascade)
+
+    def _set_cascade(self, cascade):
+        # The lexicon is derived from the trained model, so a loaded snapshot gets the same one
+        self.pos_tagger.set_cascade(cascade)
 
     def check_grammar(self, paragraph):
         """
@@ -30,52 +97,64 @@ class GrammarChecker:
 
         erroneous_ranges = []
 
+        # Only the sentences with a trigger word followed by other words need to be checked
+        sentence_words = [sentence.split() if sentence.strip() else [] for sentence in sentences]
+        needs_tags = [self.rule_index.needs_tags(words) for words in sentence_words]
+
+        # Cached results are only valid for the same tagger and rules
+        self.sentence_cache.set_version(self._version())
+        sentence_flags = {}
+        for words, needed in zip(sentence_words, needs_tags):
+            if needed:
+                key = SentenceCache.normalize(words)
+                if key not in sentence_flags:
+                    sentence_flags[key] = self.sentence_cache.get(key)
+
+        # The sentences missing from the cache are tagged in one batch, repeated ones only once
+        missing = [key for key, flags in sentence_flags.items() if flags is None]
+        for key, pos_tags in zip(missing, self.pos_tagger.predict_batch([key.split() for key in missing])):
+            # Flags are (offset from the sentence start, offset from the sentence end) ranges
+            sentence_flags[key] = ((0, 0),) if self.rule_index.violates(key.split(), pos_tags) else ()
+            self.sentence_cache.put(key, sentence_flags[key])
+
         for i, sentence in tqdm(enumerate(sentences), desc="Detecting Erroneous Sentences: ", total=len(sentences)):
             # Ignore empty sentences
             if not sentence.strip():
                 continue
 
+            self.stats["sentences"] += 1
+            if not needs_tags[i]:
+                # No rule can fire, the sentence skipped the tagger
+                self.stats["untagged"] += 1
+                continue
+
             # Get the start and end indices of the current sentence in the paragraph
             start_index = start_indices[i]
             end_index = start_index + len(sentence)
 
-            # Tokenize the sentence into words
-            words = sentence.split()
-
-            # Get POS tags for the sentence using the pos_tagger
-            pos_tags = self.pos_tagger.predict(words)
-            # print(pos_tags)
-
-            # Check for grammar rules in the sentence
-            for j, word in enumerate(words):
-                # Rule 1: 'මම' followed by a 'VFM' word should end with 'මි'
-                if word == "මම":
-                    for k in range(j + 1, len(words)):  # Look at all words after 'මම'
-                        if pos_tags[k] == "VFM" or pos_tags[k] == "VP":  # Check if the POS tag is 'VFM'
-                            if not words[k].endswith("මි"):
-                                erroneous_ranges.append((start_index, end_index))
-                                break
-                    else:
-                        continue  # No match found; move to next word
-                    break  # Match found; exit the outer loop
-
-                # Rule 2: 'අපි' followed by a 'VFM' word should end with 'මු'
-                if word == "අපි":
-                    for k in range(j + 1, len(words)):  # Look at all words after 'අපි'
-                        if pos_tags[k] == "VFM" or pos_tags[k] == "VP":  # Check if the POS tag is 'VFM'
-                            if not words[k].endswith("මු"):
-                                erroneous_ranges.append((start_index, end_index))
-                                break
-                    else:
-                        continue  # No match found; move to next word
-                    break  # Match found; exit the outer loop
+            # Map the flags of the sentence to paragraph indices
+            for start_offset, end_offset in sentence_flags[SentenceCache.normalize(sentence_words[i])]:
+                erroneous_ranges.append((start_index + start_offset, end_index - end_offset))
 
         return erroneous_ranges
 
+    def _version(self):
+        """
+        Returns what the result of a sentence depends on besides its words: the rules and the tagger state.
+        """
+        pos_tagger = self.pos_tagger
+
+        # Taggers without a model version, such as XLMRPOSTagger, do not change once built, the tagger itself is
+        # kept in the version so a replaced tagger is told apart
+        model_version = getattr(pos_tagger, "model_version", None)
+        return (self.rules_hash, pos_tagger if model_version is None else model_version,
+                getattr(pos_tagger, "beam_width", None), getattr(pos_tagger, "beam_threshold", None))
+
 
 # Initialize the GrammarChecker with the POS tagger
+# Run from the repository root with: python -m GrammarChecker.GrammarChecker
 if __name__ == "__main__":
-    grammar_checker = GrammarChecker(pos_tagger_dataset_location="POSTagDataset/tagged_sentences.txt")
+    grammar_checker = GrammarChecker(pos_tagger_dataset_location=DEFAULT_DATASET)
 
     # Input paragraph
     paragraph = ("මම ඊයේ උද්‍යානයට ගියා, ළමයි ටිකක් පැසිපන්දු ක්‍රීඩා කරනවා දැක්කා. මමයි මල්ලියි එයාලට සෙල්ලමකට එකතු "
@@ -1,67 +1,25 @@
 from collections import defaultdict, Counter
 from tqdm import tqdm
-import re
+
+from .corpus_loader import DEFAULT_DATASET, load_data as _load_data
 
 
 def load_data(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.read().strip().split('\n')
-
-    sentences, tags = [], []
-    sentence, tag_seq = [], []
-
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        try:
-            if line.strip():
-                word, tag = line.split()
-                # Clean the tag to include only English letters and capitalize them
-                tag = ''.join(re.findall(r'[a-zA-Z]', tag)).upper()
-                sentence.append(word)
-                tag_seq.append(tag)
-
-                # Check for full stop (FS) to mark the end of a sentence
-                if tag == 'FS':
-                    sentences.append(sentence)
-                    tags.append(tag_seq)
-                    sentence, tag_seq = [], []
-        except Exception as e:
-            print(f"Error processing line: {line}")
-            print(e)
-            # Skip to the next full stop (FS)
-            while i < len(lines):
-                i += 1
-                if lines[i].strip():
-                    try:
-                        _, tag = lines[i].split()
-                        tag = ''.join(re.findall(r'[a-zA-Z]', tag)).upper()
-                        if tag == 'FS':
-                            break
-                    except Exception:
-                        continue
-            sentence, tag_seq = [], []  # Reset sentence and tags
-        finally:
-            i += 1
-
-    # Add the last sentence if not added
-    if sentence:
-        sentences.append(sentence)
-        tags.append(tag_seq)
-
-    return sentences, tags
+    return _load_data(file_path, report_errors=True)
 
 
 class POS_Tagger:
-    def __init__(self, file_path):
+    def __init__(self, file_path=None, sentences=None, tags=None):
         """
         Initializes the POS tagger with a dataset loaded from a file.
         file_path: Path to the file containing tagged sentences.
+        sentences, tags: Already loaded tagged sentences, used instead of the file when given.
         """
         self.constant_tags = {}  # Dictionary for words with constant POS tags
         self.ambiguous_words = defaultdict(Counter)  # Dictionary for words with multiple POS tags
         self.context_rules = defaultdict(Counter)  # Rules based on neighboring POS patterns
-        sentences, tags = load_data(file_path)
+        if sentences is None:
+            sentences, tags = load_data(file_path)
         tagged_sentences = list(zip(sentences, tags))
         self._train(tagged_sentences)
 
@@ -111,12 +69,12 @@ class POS_Tagger:
         tags = [None] * len(sentence)
 
         # Tag words with constant tags
-        for i, word in tqdm(enumerate(sentence), desc="Tagging Constant Words", leave=False):
+        for i, word in enumerate(sentence):
             if word in self.constant_tags:
                 tags[i] = self.constant_tags[word]
 
         # Tag ambiguous words using context
-        for i, word in tqdm(enumerate(sentence), desc="Resolving Ambiguous Words", leave=True):
+        for i, word in enumerate(sentence):
             if tags[i] is None:  # Only process untagged words
                 left_tag = tags[i - 1] if i > 0 else None
                 right_tag = tags[i + 1] if i < len(sentence) - 1 else None
@@ -126,8 +84,9 @@ class POS_Tagger:
 
 
 # Example usage
+# Run from the repository root with: python -m GrammarChecker.POSTagger
 if __name__ == "__main__":
-    file_path = "POSTagDataset/tagged_sentences.txt"  # Replace with the path to your data file
+    file_path = DEFAULT_DATASET  # Replace with the path to your data file
     pos_tagger = POS_Tagger(file_path)
     test_sentence = ["ඊශ්‍රායල්", "මිසයිල", "ප්‍රහාර", "වලින්", "පලස්තීනුවෝ", "4", "ක්", "මිය", "යති"]
     print(pos_tagger.tag_sentence(test_sentence))
@@ -1,55 +1,213 @@
-import re
-from collections import defaultdict, Counter
+import hashlib
+import itertools
+import json
+import os
+from collections import Counter, defaultdict
 import math
+import re
+import numpy as np
 from tokenizers import ByteLevelBPETokenizer
 
+from common.lru_cache import LRUCache
+from common.staging_directory import replace_directory
+from .corpus_loader import DEFAULT_DATASET, CorpusStatistics, load_data
+
+# Snapshot directory layout, the arrays are .npy files and the log-probability arrays are memory mapped:
+#   meta.json          format version, training data hash and the tag list in decoding order
+#   words.json         vocabulary words in row order of the emission arrays
+#   log_start          log start probability of every tag
+#   log_transitions    (tags x tags) log transition probabilities
+#   log_emissions      (words x tags) log emission probabilities
+#   log_fallbacks      byte-pair log emission estimate of every word, used for the tags it was not seen with
+#   tag_counts         count of every tag id, in order of first appearance in the training data
+#   bigram_*           first tag ids, second tag ids and counts of the tag bigrams
+#   word_tag_*         word ids, tag ids and counts of the seen (word, tag) pairs
+#   vocab.json, merges.txt  byte-pair tokenizer files
+SNAPSHOT_VERSION = 2
+
+# Model versions are unique in the process, a new tagger never gets the version of another one
+_model_versions = itertools.count(1)
+
+
+class StaleSnapshotError(ValueError):
+    """Raised when a snapshot was trained on different data than expected or written by another version."""
+
+
+def training_data_hash(sentences, tags, previous=None):
+    """
+    Returns a hash of tagged training sentences, stored in snapshots to detect stale models.
+    It is the sum of the hashes of the sentences, so the hash of more sentences can be continued from the
+    hash of the earlier ones.
+    :param previous: Hash of the sentences trained on before these ones.
+    """
+    total = 0 if previous is None else int(previous, 16)
+    for sentence, tag_seq in zip(sentences, tags):
+        digest = hashlib.blake2b(("\t".join(sentence) + "\n" + "\t".join(tag_seq) + "\n").encode('utf-8'),
+                                 digest_size=16).digest()
+        total = (total + int.from_bytes(digest, 'little')) % (1 << 128)
+    return f"{total:032x}"
+
+
+def _bytes_to_unicode():
+    """
+    Returns the character the byte-level tokenizer writes for every byte, the GPT-2 byte alphabet.
+    """
+    printable = (list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1))
+                 + list(range(ord("®"), ord("ÿ") + 1)))
+    characters = printable[:]
+    n = 0
+    for byte in range(256):
+        if byte not in printable:
+            printable.append(byte)
+            characters.append(256 + n)
+            n += 1
+    return dict(zip(printable, map(chr, characters)))
+
 
 class POSTagger:
-    def __init__(self):
+    def __init__(self, oov_cache_size=10000, beam_width=None, beam_threshold=None, lexicon=None, cascade=False,
+                 tokenizer_vocab_size=30000, tokenizer_min_frequency=2):
+        """
+        :param oov_cache_size: maximum number of unknown words whose emission estimate is kept between predictions
+        :param beam_width: number of best tags kept at each position, at least 1. None, or a width of at least the
+                           number of tags, keeps all of them (exact Viterbi)
+        :param beam_threshold: tags scoring more than this many log units below the best tag of a position are
+                               dropped, at least 0. None keeps all of them
+        :param lexicon: dictionary of words with a single possible tag. When given, predict tags these words from
+                        it and runs Viterbi only over the other words (cascade mode), see constant_tags()
+        :param cascade: cascade mode with the constant_tags() lexicon of the model, rebuilt whenever the model
+                        is trained, updated or loaded. It replaces the lexicon argument
+        :param tokenizer_vocab_size: vocabulary size of the byte-pair tokenizer trained for unknown words
+        :param tokenizer_min_frequency: minimum frequency of a pair of subwords merged by the tokenizer
+        """
         self.transition_probs = defaultdict(lambda: defaultdict(float))
         self.emission_probs = defaultdict(lambda: defaultdict(float))
         self.tags = set()
         self.vocab = set()
         self.tokenizer = ByteLevelBPETokenizer()
+        self.tokenizer_vocab_size = tokenizer_vocab_size
+        self.tokenizer_min_frequency = tokenizer_min_frequency
+        self.data_hash = None
+
+        # Bytes of the subwords that are also vocabulary words, built by finalize()
+        self.subword_pattern = None
+
+        # Raw counts of the training data, the probabilities are estimated from them
+        self.statistics = CorpusStatistics()
+
+        # Dense tag indexed model used by predict, built by finalize()
+        self.tag_list = []
+        self.word_index = {}
+        self.log_start = None
+        self.log_transitions = None
+        self.log_emissions = None
+        self.log_fallbacks = None
+
+        # LRU cache of the log emission of unknown words, it is the same for every tag
+        self.oov_cache = LRUCache(oov_cache_size)
+
+        # Changes whenever the predictions may change: training, updates, loading and lexicon changes
+        self.model_version = next(_model_versions)
+
+        # Beam pruning, exact decoding when both are None
+        if beam_width is not None and beam_width < 1:
+            raise ValueError(f"beam_width must be at least 1, got {beam_width}")
+        if beam_threshold is not None and beam_threshold < 0:
+            raise ValueError(f"beam_threshold must not be negative, got {beam_threshold}")
+        self.beam_width = beam_width
+        self.beam_threshold = beam_threshold
+
+        # Cascade mode, counts of the words tagged from the lexicon and by Viterbi
+        self.lexicon = lexicon
+        self.cascade = cascade
+        self.cascade_stats = Counter()
+
+    @property
+    def lexicon(self):
+        return self._lexicon
+
+    @lexicon.setter
+    def lexicon(self, lexicon):
+        self._lexicon = lexicon
+        self.model_version = next(_model_versions)
 
     def train_tokenizer(self, sentences):
-        """Train the byte-pair tokenizer on the given corpus."""
-        with open("temp_corpus.txt", "w", encoding="utf-8") as f:
-            for sentence in sentences:
-                f.write(" ".join(sentence) + "\n")
-
-        self.tokenizer.train(["temp_corpus.txt"], vocab_size=30000, min_frequency=2)
+        """Train the byte-pair tokenizer on the given corpus, streaming the sentences from memory."""
+        self.tokenizer.train_from_iterator((" ".join(sentence) for sentence in sentences),
+                                           vocab_size=self.tokenizer_vocab_size,
+                                           min_frequency=self.tokenizer_min_frequency, length=len(sentences))
 
-    def train(self, sentences, tags):
+    def train(self, sentences, tags, statistics=None):
         """
         Train the HMM-based POS tagger.
         :param sentences: List of sentences (list of words).
         :param tags: List of corresponding POS tag sequences.
+        :param statistics: CorpusStatistics of the sentences, counted here when not given.
         """
         self.train_tokenizer(sentences)
+        self.data_hash = training_data_hash(sentences, tags)
 
-        tag_bigrams = Counter()
-        word_tag_pairs = Counter()
-        tag_counts = Counter()
+        if statistics is None:
+            statistics = CorpusStatistics.from_sentences(sentences, tags)
+
+        # The counts are copied, later updates must not change the caller's statistics
+        self.statistics.update(statistics)
+
+        # Tags are added in order of first appearance, which fixes the decoding order of the tags
+        self.vocab.update(word for word, _ in self.statistics.word_tags)
+        self.tags.update(self.statistics.tags)
 
-        for sentence, tag_seq in zip(sentences, tags):
-            for i, (word, tag) in enumerate(zip(sentence, tag_seq)):
-                self.vocab.add(word)
-                self.tags.add(tag)
-                word_tag_pairs[(word, tag)] += 1
-                tag_counts[tag] += 1
+        self._estimate(self.tags)
+        self.finalize()
 
-                if i > 0:
-                    prev_tag = tag_seq[i - 1]
-                    tag_bigrams[(prev_tag, tag)] += 1
+    def update(self, sentences, tags):
+        """
+        Adds newly tagged sentences to the trained model. The model is the same as after training on all the
+        sentences so far, but only the probabilities of the tags seen in the new sentences are recomputed.
+        The byte-pair tokenizer is not retrained, unknown words are still estimated with the current one.
+        :param sentences: List of new sentences (list of words).
+        :param tags: List of corresponding POS tag sequences.
+        """
+        statistics = CorpusStatistics.from_sentences(sentences, tags)
+        self.statistics.update(statistics)
+        self.data_hash = training_data_hash(sentences, tags, self.data_hash)
+
+        new_words = [word for word in dict.fromkeys(word for word, _ in statistics.word_tags)
+                     if word not in self.vocab]
+        self.vocab.update(new_words)
+
+        if any(tag not in self.tags for tag in statistics.tags):
+            # The tag set is built like in train, so the tags get the decoding order of a full retrain
+            self.tags = set()
+            self.tags.update(self.statistics.tags)
+            self.tag_list = []
+
+        updated_tags = set(statistics.tags)
+        self._estimate(updated_tags)
+
+        token_vocab = self.tokenizer.get_vocab()
+        if any(word in token_vocab for word in new_words):
+            # A new word is also a subword, the byte-pair estimate of every word may change
+            self.finalize()
+        else:
+            self._refresh(new_words, updated_tags)
+
+    def _estimate(self, tags):
+        """
+        Recomputes the transition and emission probabilities of the given tags from the counts,
+        then smooths the unseen transitions.
+        """
+        tag_counts = self.statistics.tags
 
         # Calculate transition probabilities
-        for (prev_tag, curr_tag), count in tag_bigrams.items():
-            self.transition_probs[prev_tag][curr_tag] = count / tag_counts[prev_tag]
+        for (prev_tag, curr_tag), count in self.statistics.tag_bigrams.items():
+            if prev_tag in tags:
+                self.transition_probs[prev_tag][curr_tag] = count / tag_counts[prev_tag]
 
         # Calculate emission probabilities
-        for (word, tag), count in word_tag_pairs.items():
-            self.emission_probs[tag][word] = count / tag_counts[tag]
+        for (word, tag), count in self.statistics.word_tags.items():
+            if tag in tags:
+                self.emission_probs[tag][word] = count / tag_counts[tag]
 
         # Add smoothing for unseen transitions
         for tag in self.tags:
@@ -57,54 +215,450 @@ class POSTagger:
                 if next_tag not in self.transition_probs[tag]:
                     self.transition_probs[tag][next_tag] = 1e-6
 
+    def finalize(self):
+        """
+        Stores the trained probabilities as dense tag indexed log-probability arrays.
+        The logs are taken with math.log, exactly like the dictionary based decoder did.
+        """
+        self._finalize_transitions()
+        tag_index = {tag: i for i, tag in enumerate(self.tag_list)}
+
+        # One row per vocabulary word, tags the word was never seen with use the byte-pair estimate
+        vocab_list = list(self.vocab)
+        self.word_index = {word: i for i, word in enumerate(vocab_list)}
+        self._compile_subword_pattern()
+        self.log_fallbacks = self._log_fallbacks(vocab_list)
+        self.log_emissions = np.repeat(self.log_fallbacks[:, None], len(self.tag_list), axis=1)
+
+        for tag, word_probs in self.emission_probs.items():
+            if tag not in tag_index:
+                continue
+            for word, prob in word_probs.items():
+                self.log_emissions[self.word_index[word], tag_index[tag]] = math.log(prob)
+
+        # Cached estimates depend on the vocabulary
+        self.oov_cache.clear()
+        self._derive_lexicon()
+        self.model_version = next(_model_versions)
+
+    def _finalize_transitions(self):
+        # Tags keep the set iteration order so ties are broken like before, a loaded model keeps its order
+        self.tag_list = [tag for tag in self.tag_list if tag in self.tags]
+        self.tag_list += [tag for tag in self.tags if tag not in self.tag_list]
+
+        self.log_start = np.array([math.log(self.transition_probs['START'][tag] + 1e-6) for tag in self.tag_list])
+        self.log_transitions = np.array([[math.log(self.transition_probs[prev_tag][curr_tag] + 1e-6)
+                                          for curr_tag in self.tag_list] for prev_tag in self.tag_list],
+                                        dtype=np.float64).reshape(len(self.tag_list), len(self.tag_list))
+
+    def _compile_subword_pattern(self):
+        """
+        Compiles the pattern matching the bytes of the tokenizer subwords that are also vocabulary words.
+        The subwords of a word are pieces of its bytes, so only a word matching the pattern can have one.
+        """
+        byte_values = {character: byte for byte, character in _bytes_to_unicode().items()}
+        subwords = {bytes(byte_values[character] for character in token) for token in self.tokenizer.get_vocab()
+                    if token in self.vocab and all(character in byte_values for character in token)}
+        self.subword_pattern = re.compile(b"|".join(map(re.escape, sorted(subwords)))) if subwords else None
+
+    def _log_fallbacks(self, words):
+        """
+        Returns the byte-pair log emission estimate of every word, only encoding the words that can contain a
+        vocabulary subword. The others get the estimate of a word without one.
+        """
+        fallbacks = np.full(len(words), math.log(self._subword_emission_prob([])))
+        if self.subword_pattern is None:
+            return fallbacks
+
+        candidates = [i for i, word in enumerate(words) if self.subword_pattern.search(word.encode('utf-8'))]
+        encodings = self.tokenizer.encode_batch([words[i] for i in candidates]) if candidates else []
+        for i, encoding in zip(candidates, encodings):
+            fallbacks[i] = math.log(self._subword_emission_prob(encoding.tokens))
+        return fallbacks
+
+    def _refresh(self, new_words, updated_tags):
+        """
+        Updates the dense arrays after an update, appending rows for the new words and recomputing the
+        columns of the updated tags. The other columns are copied.
+        """
+        previous_index = {tag: i for i, tag in enumerate(self.tag_list)}
+        self._finalize_transitions()
+
+        num_words = len(self.word_index)
+        for word in new_words:
+            self.word_index[word] = len(self.word_index)
+            self.oov_cache.pop(word)
+        new_fallbacks = self._log_fallbacks(new_words)
+        self.log_fallbacks = np.concatenate([self.log_fallbacks, new_fallbacks])
+
+        log_emissions = np.empty((len(self.word_index), len(self.tag_list)))
+        for j, tag in enumerate(self.tag_list):
+            if tag in updated_tags or tag not in previous_index:
+                log_emissions[:, j] = self.log_fallbacks
+                for word, prob in self.emission_probs[tag].items():
+                    log_emissions[self.word_index[word], j] = math.log(prob)
+            else:
+                # New words were not seen with this tag
+                log_emissions[:num_words, j] = self.log_emissions[:, previous_index[tag]]
+                log_emissions[num_words:, j] = new_fallbacks
+        self.log_emissions = log_emissions
+        self._derive_lexicon()
+        self.model_version = next(_model_versions)
+
+    def set_cascade(self, cascade):
+        """
+        Turns cascade mode with the constant_tags() lexicon on or off, see the cascade constructor argument.
+        """
+        self.cascade = cascade
+        self.lexicon = None
+        self._derive_lexicon()
+
+    def _derive_lexicon(self):
+        # In cascade mode the lexicon follows the counts, the words of an update may get a second tag
+        if self.cascade:
+            self.lexicon = self.constant_tags()
+
+    def save(self, path):
+        """
+        Writes the trained model to a snapshot directory that load() reads back. The snapshot is written next to
+        the directory and swapped in when complete, so a loaded snapshot can be saved over itself.
+        :param path: Snapshot directory, created if needed and replaced as a whole.
+        """
+        with replace_directory(path) as staging:
+            self._write_snapshot(staging)
+
+    def _write_snapshot(self, path):
+        tag_index = {tag: i for i, tag in enumerate(self.tag_list)}
+        words = sorted(self.word_index, key=self.word_index.get)
+
+        # Counts in their order of first appearance, the probability tables are estimated from them again
+        statistics = self.statistics
+        bigrams = list(statistics.tag_bigrams.items())
+        word_tags = list(statistics.word_tags.items())
+
+        arrays = {
+            "log_start": self.log_start,
+            "log_transitions": self.log_transitions,
+            "log_emissions": self.log_emissions,
+            "log_fallbacks": self.log_fallbacks,
+            "tag_counts": np.array([[tag_index[tag], count] for tag, count in statistics.tags.items()],
+                                   dtype=np.int64).reshape(-1, 2),
+            "bigram_first": np.array([tag_index[first] for (first, _), _ in bigrams], dtype=np.int32),
+            "bigram_second": np.array([tag_index[second] for (_, second), _ in bigrams], dtype=np.int32),
+            "bigram_counts": np.array([count for _, count in bigrams], dtype=np.int64),
+            "word_tag_words": np.array([self.word_index[word] for (word, _), _ in word_tags], dtype=np.int32),
+            "word_tag_tags": np.array([tag_index[tag] for (_, tag), _ in word_tags], dtype=np.int32),
+            "word_tag_counts": np.array([count for _, count in word_tags], dtype=np.int64),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+
+        with open(os.path.join(path, "words.json"), 'w', encoding='utf-8') as f:
+            json.dump(words, f, ensure_ascii=False)
+
+        self.tokenizer.save_model(path)
+
+        with open(os.path.join(path, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({"version": SNAPSHOT_VERSION, "data_hash": self.data_hash, "tags": self.tag_list}, f,
+                      ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, data_hash=None, **options):
+        """
+        Reads a snapshot written by save(). The log-probability arrays are memory mapped.
+        :param path: Snapshot directory.
+        :param data_hash: Expected training_data_hash of the training data, checked when given.
+        :param options: Constructor options, such as oov_cache_size or beam_width.
+        :return: The loaded POSTagger.
+        """
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        if meta.get("version") != SNAPSHOT_VERSION:
+            raise StaleSnapshotError(f"{path} is not a POS tagger snapshot of version {SNAPSHOT_VERSION}")
+        if data_hash is not None and meta["data_hash"] != data_hash:
+            raise StaleSnapshotError(f"{path} was trained on different data")
+
+        with open(os.path.join(path, "words.json"), 'r', encoding='utf-8') as f:
+            words = json.load(f)
+
+        def load_array(name, mmap_mode=None):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+        tagger = cls(**options)
+        tagger.data_hash = meta["data_hash"]
+        tagger.tag_list = meta["tags"]
+        tagger.tags = set(tagger.tag_list)
+        tagger.vocab = set(words)
+        tagger.word_index = {word: i for i, word in enumerate(words)}
+        tagger.tokenizer = ByteLevelBPETokenizer(os.path.join(path, "vocab.json"), os.path.join(path, "merges.txt"))
+        tagger._compile_subword_pattern()
+
+        tagger.log_start = load_array("log_start", 'r')
+        tagger.log_transitions = load_array("log_transitions", 'r')
+        tagger.log_emissions = load_array("log_emissions", 'r')
+        tagger.log_fallbacks = load_array("log_fallbacks", 'r')
+
+        # Restore the counts and estimate the probability tables from them
+        tag_list = tagger.tag_list
+        statistics = tagger.statistics
+        statistics.tags.update({tag_list[tag_id]: count for tag_id, count in load_array("tag_counts").tolist()})
+        statistics.tag_bigrams.update({(tag_list[first], tag_list[second]): count for first, second, count in
+                                       zip(load_array("bigram_first").tolist(), load_array("bigram_second").tolist(),
+                                           load_array("bigram_counts").tolist())})
+        statistics.word_tags.update({(words[word_id], tag_list[tag_id]): count for word_id, tag_id, count in
+                                     zip(load_array("word_tag_words").tolist(), load_array("word_tag_tags").tolist(),
+                                         load_array("word_tag_counts").tolist())})
+        tagger._estimate(tagger.tags)
+        tagger._derive_lexicon()
+        tagger.model_version = next(_model_versions)
+
+        return tagger
+
     def predict(self, sentence):
         """
         Predict the POS tags for a given sentence using the Viterbi algorithm.
         :param sentence: List of words.
         :return: List of predicted POS tags and their confidence levels.
         """
-        n = len(sentence)
-        viterbi = defaultdict(lambda: defaultdict(lambda: -math.inf))
-        backpointer = defaultdict(lambda: defaultdict(str))
+        if not sentence:
+            return []
+        if self.lexicon is not None:
+            return self._predict_cascade(sentence)
+
+        tag_ids = self._viterbi(self._log_emission_rows(sentence), self.log_start)
+        return [self.tag_list[tag] for tag in tag_ids]
+
+    def _predict_cascade(self, sentence):
+        """
+        Tags the lexicon words with their only tag and decodes the spans of other words between them,
+        the lexicon tags around a span are fixed states of its Viterbi path.
+        """
+        tag_index = {tag: i for i, tag in enumerate(self.tag_list)}
+        lexicon = self.lexicon
+        tag_ids = [tag_index.get(lexicon.get(word)) for word in sentence]
+
+        spans = []
+        i = 0
+        while i < len(sentence):
+            if tag_ids[i] is not None:
+                i += 1
+                continue
+            start = i
+            while i < len(sentence) and tag_ids[i] is None:
+                i += 1
+            spans.append((start, i))
+
+        decoded = sum(end - start for start, end in spans)
+        self.cascade_stats["lexicon"] += len(sentence) - decoded
+        self.cascade_stats["decoded"] += decoded
+        if not spans:
+            return [self.tag_list[tag] for tag in tag_ids]
+
+        # Emissions of all the decoded words are computed together
+        rows = self._log_emission_rows([word for start, end in spans for word in sentence[start:end]])
+        offset = 0
+        for start, end in spans:
+            emissions = rows[offset:offset + end - start]
+            offset += end - start
+
+            start_scores = self.log_start if start == 0 else self.log_transitions[tag_ids[start - 1]]
+            end_scores = None if end == len(sentence) else self.log_transitions[:, tag_ids[end]]
+            tag_ids[start:end] = self._viterbi(emissions, start_scores, end_scores)
+
+        return [self.tag_list[tag] for tag in tag_ids]
+
+    def _viterbi(self, emissions, start_scores, end_scores=None):
+        """
+        Returns the best tag id sequence for a (words x tags) log emission matrix.
+        :param start_scores: Log score of every tag at the first word.
+        :param end_scores: Log score of moving from every tag of the last word to a fixed next tag, None when
+                           the sequence ends the sentence.
+        """
+        n = len(emissions)
+        backpointer = np.zeros((n, len(self.tag_list)), dtype=np.intp)
 
         # Initialization
-        for tag in self.tags:
-            word = sentence[0]
-            emission = self._get_emission_prob(word, tag)
-            viterbi[0][tag] = math.log(self.transition_probs['START'][tag] + 1e-6) + math.log(emission)
+        viterbi = start_scores + emissions[0]
+
+        tag_range = np.arange(len(self.tag_list))
+        beam_pruning = self._beam_pruning()
 
-        # Recursion
+        # Recursion, scores[prev_tag, curr_tag] is summed in the same order as the scalar decoder
         for i in range(1, n):
-            for curr_tag in self.tags:
-                for prev_tag in self.tags:
-                    prob = (
-                        viterbi[i - 1][prev_tag]
-                        + math.log(self.transition_probs[prev_tag][curr_tag] + 1e-6)
-                        + math.log(self._get_emission_prob(sentence[i], curr_tag))
-                    )
-                    if prob > viterbi[i][curr_tag]:
-                        viterbi[i][curr_tag] = prob
-                        backpointer[i][curr_tag] = prev_tag
+            if beam_pruning:
+                # Only the tags kept by the beam are extended, in increasing order so ties break the same way
+                active = np.flatnonzero(self._beam_mask(viterbi))
+                scores = (viterbi[active, None] + self.log_transitions[active]) + emissions[i]
+                best_previous = np.argmax(scores, axis=0)
+                backpointer[i] = active[best_previous]
+                viterbi = scores[best_previous, tag_range]
+                continue
+
+            scores = (viterbi[:, None] + self.log_transitions) + emissions[i]
+
+            # argmax keeps the first best previous tag, like the strict comparison of the scalar loop
+            backpointer[i] = np.argmax(scores, axis=0)
+            viterbi = scores[backpointer[i], tag_range]
 
         # Termination
-        best_tag = None
-        best_prob = -math.inf
-        for tag in self.tags:
-            prob = viterbi[n - 1][tag]
-            if prob > best_prob:
-                best_prob = prob
-                best_tag = tag
+        if end_scores is not None:
+            viterbi = viterbi + end_scores
+        best_tag = int(np.argmax(viterbi))
 
         # Backtrace
         predicted_tags = [best_tag]
         for i in range(n - 1, 0, -1):
-            best_tag = backpointer[i][best_tag]
-            predicted_tags.insert(0, best_tag)
+            best_tag = int(backpointer[i][best_tag])
+            predicted_tags.append(best_tag)
+
+        return predicted_tags[::-1]
+
+    def predict_batch(self, sentences, bucket_width=4, batch_size=256):
+        """
+        Predict the POS tags of many sentences, decoding sentences of similar length together.
+        The tags are identical to calling predict on every sentence.
+        In cascade mode the sentences are decoded one at a time, only their spans of non-lexicon words.
+        :param sentences: List of sentences (list of words).
+        :param bucket_width: Sentences whose lengths fall in the same range of this width are decoded together.
+        :param batch_size: Maximum number of sentences decoded together.
+        :return: List of predicted POS tag sequences, in the order of the sentences.
+        """
+        if self.lexicon is not None:
+            return [self.predict(sentence) for sentence in sentences]
+
+        results = [[] for _ in sentences]
+
+        buckets = defaultdict(list)
+        for index, sentence in enumerate(sentences):
+            if sentence:
+                buckets[(len(sentence) - 1) // bucket_width].append(index)
+
+        for indexes in buckets.values():
+            for start in range(0, len(indexes), batch_size):
+                batch = indexes[start:start + batch_size]
+                for index, tags in zip(batch, self._predict_padded([sentences[index] for index in batch])):
+                    results[index] = tags
+
+        return results
+
+    def _predict_padded(self, sentences):
+        """
+        Runs Viterbi over a batch of sentences as (batch x tags) arrays, the positions after the end of a
+        sentence leave its Viterbi row unchanged.
+        """
+        num_tags = len(self.tag_list)
+        lengths = np.array([len(sentence) for sentence in sentences])
+        max_length = int(lengths.max())
+
+        # Padded (batch x positions x tags) emissions, computed in one go for all the words of the batch
+        emissions = np.zeros((len(sentences), max_length, num_tags))
+        rows = self._log_emission_rows([word for sentence in sentences for word in sentence])
+        sentence_ids = np.repeat(np.arange(len(sentences)), lengths)
+        positions = np.concatenate([np.arange(length) for length in lengths])
+        emissions[sentence_ids, positions] = rows
+
+        backpointer = np.zeros((len(sentences), max_length, num_tags), dtype=np.intp)
+
+        # Initialization
+        viterbi = self.log_start + emissions[:, 0]
+
+        # Recursion, scores[sentence, prev_tag, curr_tag] is summed in the same order as predict
+        for i in range(1, max_length):
+            previous = viterbi
+            if self._beam_pruning():
+                # Tags dropped by the beam can no longer be extended
+                previous = np.where(self._beam_mask(viterbi), viterbi, -np.inf)
+
+            scores = (previous[:, :, None] + self.log_transitions) + emissions[:, i, None, :]
+            backpointer[:, i] = np.argmax(scores, axis=1)
+            best_scores = np.take_along_axis(scores, backpointer[:, i, None, :], axis=1)[:, 0]
+            viterbi = np.where((i < lengths)[:, None], best_scores, viterbi)
 
-        # Normalize confidences to a scale of 0-1 based on the max score in the Viterbi path
-        max_score = max(max(viterbi[i].values()) for i in range(n))
+        # Termination
+        best_tags = np.argmax(viterbi, axis=1)
+
+        # Backtrace of all the sentences at once, each one starts from its best tag at its last position
+        paths = np.zeros((len(sentences), max_length), dtype=np.intp)
+        current = best_tags.copy()
+        batch_range = np.arange(len(sentences))
+        for i in range(max_length - 1, -1, -1):
+            ending = lengths - 1 == i
+            current[ending] = best_tags[ending]
+            paths[:, i] = current
+            if i > 0:
+                current = backpointer[batch_range, i, current]
+
+        return [[self.tag_list[tag] for tag in path[:length]] for path, length in zip(paths.tolist(), lengths.tolist())]
+
+    def _beam_pruning(self):
+        return self.beam_width is not None or self.beam_threshold is not None
+
+    def _beam_mask(self, viterbi):
+        """
+        Returns which tags of the last axis of a Viterbi array are kept by the beam.
+        Tags tying with the last tag of the beam are kept as well.
+        """
+        keep = np.ones(viterbi.shape, dtype=bool)
+        if self.beam_threshold is not None:
+            keep &= viterbi >= viterbi.max(axis=-1, keepdims=True) - self.beam_threshold
+        if self.beam_width is not None:
+            # A beam wider than the tag set keeps every tag
+            beam_width = min(self.beam_width, len(self.tag_list))
+            if beam_width < viterbi.shape[-1]:
+                kth_best = -np.partition(-viterbi, beam_width - 1, axis=-1)[..., beam_width - 1, None]
+                keep &= viterbi >= kth_best
+        return keep
+
+    def _log_emission_rows(self, sentence):
+        """
+        Returns the (words x tags) log emission matrix of a sentence.
+        """
+        rows = np.empty((len(sentence), len(self.tag_list)))
+        word_ids = np.array([self.word_index.get(word, -1) for word in sentence], dtype=np.intp)
+        known = word_ids >= 0
+        rows[known] = self.log_emissions[word_ids[known]]
+
+        # An unknown word gets the same byte-pair estimate for every tag
+        unknown_emissions = self._unknown_log_emissions([word for word in sentence if word not in self.word_index])
+        for i in np.flatnonzero(~known).tolist():
+            rows[i] = unknown_emissions[sentence[i]]
+        return rows
+
+    def _unknown_log_emissions(self, words):
+        """
+        Returns the log emission of every unknown word, estimating the words missing from the cache in one batch.
+        """
+        emissions = {}
+        missing = []
+        for word in dict.fromkeys(words):
+            emission = self.oov_cache.get(word)
+            if emission is None:
+                missing.append(word)
+            else:
+                emissions[word] = emission
+
+        for word, emission in zip(missing, self._log_fallbacks(missing).tolist()):
+            emissions[word] = emission
+            self.oov_cache.put(word, emission)
 
-        return predicted_tags
+        return emissions
+
+    def oov_cache_stats(self):
+        return self.oov_cache.stats()
+
+    def constant_tags(self):
+        """
+        Returns the words seen with a single tag in the training data and that tag, the same lexicon as the
+        constant_tags of POS_Tagger trained on the same corpus. It can be used as the cascade lexicon.
+        """
+        tag_counts = Counter()
+        lexicon = {}
+        for tag, word_probs in self.emission_probs.items():
+            for word in word_probs:
+                tag_counts[word] += 1
+                lexicon[word] = tag
+        return {word: tag for word, tag in lexicon.items() if tag_counts[word] == 1}
 
     def _get_emission_prob(self, word, tag):
         """
@@ -115,7 +669,12 @@ class POSTagger:
             return self.emission_probs[tag][word]
 
         # Byte-pair tokenization for unknown words
-        subwords = self.tokenizer.encode(word).tokens
+        return self._subword_emission_prob(self.tokenizer.encode(word).tokens)
+
+    def _subword_emission_prob(self, subwords):
+        """
+        Emission probability estimated from the byte-pair subwords of an unknown word, the same for every tag.
+        """
         prob = 1e-6
         for subword in subwords:
             if subword in self.vocab:
@@ -123,58 +682,10 @@ class POSTagger:
         return prob
 
 
-def load_data(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.read().strip().split('\n')
-
-    sentences, tags = [], []
-    sentence, tag_seq = [], []
-
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        try:
-            if line.strip():
-                word, tag = line.split()
-                # Clean the tag to include only English letters and capitalize them
-                tag = ''.join(re.findall(r'[a-zA-Z]', tag)).upper()
-                sentence.append(word)
-                tag_seq.append(tag)
-
-                # Check for full stop (FS) to mark the end of a sentence
-                if tag == 'FS':
-                    sentences.append(sentence)
-                    tags.append(tag_seq)
-                    sentence, tag_seq = [], []
-        except Exception as e:
-            # print(f"Error processing line: {line}")
-            # print(e)
-            # Skip to the next full stop (FS)
-            while i < len(lines):
-                i += 1
-                if lines[i].strip():
-                    try:
-                        _, tag = lines[i].split()
-                        tag = ''.join(re.findall(r'[a-zA-Z]', tag)).upper()
-                        if tag == 'FS':
-                            break
-                    except Exception:
-                        continue
-            sentence, tag_seq = [], []  # Reset sentence and tags
-        finally:
-            i += 1
-
-    # Add the last sentence if not added
-    if sentence:
-        sentences.append(sentence)
-        tags.append(tag_seq)
-
-    return sentences, tags
-
-
+# Run from the repository root with: python -m GrammarChecker.POSTagger_HMC
 if __name__ == "__main__":
     # Example Usage
-    file_path = "POSTagDataset/tagged_sentences.txt"
+    file_path = DEFAULT_DATASET
     sentences, tags = load_data(file_path)
 
     pos_tagger = POSTagger()
@@ -0,0 +1,114 @@
+import time
+
+import numpy as np
+
+from .POSTagger_HMC import POSTagger, StaleSnapshotError, training_data_hash
+from .corpus_loader import load_corpus
+
+
+def split_corpus(sentences, tags, holdout=0.1):
+    """
+    Splits a corpus into training sentences and the last holdout fraction of the sentences.
+    :return: (train_sentences, train_tags, test_sentences, test_tags)
+    """
+    split = len(sentences) - int(len(sentences) * holdout)
+    return sentences[:split], tags[:split], sentences[split:], tags[split:]
+
+
+def evaluate(pos_tagger, sentences, tags):
+    """
+    Tags held-out sentences one at a time.
+    :return: Dictionary with the token accuracy and the latency of the sentences.
+    """
+    correct = 0
+    total = 0
+    latencies = []
+
+    for sentence, tag_seq in zip(sentences, tags):
+        start = time.perf_counter()
+        predicted_tags = pos_tagger.predict(sentence)
+        latencies.append(time.perf_counter() - start)
+
+        correct += sum(predicted == tag for predicted, tag in zip(predicted_tags, tag_seq))
+        total += len(tag_seq)
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "accuracy": correct / total if total else 0.0,
+        "mean_ms": float(latencies.mean()) if len(latencies) else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+    }
+
+
+def benchmark_beam_widths(pos_tagger, sentences, tags, beam_widths, beam_threshold=None):
+    """
+    Compares exact Viterbi with beam-pruned decoding on held-out sentences.
+    :param beam_widths: Beam widths to compare, None is exact decoding.
+    :param beam_threshold: Log-probability threshold used together with every beam width.
+    :return: List of (beam_width, agreement with exact decoding, evaluation) rows.
+    """
+    saved = pos_tagger.beam_width, pos_tagger.beam_threshold
+    rows = []
+
+    try:
+        pos_tagger.beam_width, pos_tagger.beam_threshold = None, None
+        exact_tags = [pos_tagger.predict(sentence) for sentence in sentences]
+
+        for beam_width in beam_widths:
+            pos_tagger.beam_width = beam_width
+            pos_tagger.beam_threshold = None if beam_width is None else beam_threshold
+            evaluation = evaluate(pos_tagger, sentences, tags)
+
+            # Share of the tokens tagged like the exact decoder
+            agreement = [predicted == exact for sentence, exact_seq in zip(sentences, exact_tags)
+                         for predicted, exact in zip(pos_tagger.predict(sentence), exact_seq)]
+            rows.append((beam_width, sum(agreement) / len(agreement) if agreement else 1.0, evaluation))
+    finally:
+        pos_tagger.beam_width, pos_tagger.beam_threshold = saved
+
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare beam-pruned and exact Viterbi decoding")
+    parser.add_argument("dataset", help="tagged corpus, the last sentences are held out")
+    parser.add_argument("--holdout", type=float, default=0.1)
+    parser.add_argument("--beam-widths", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--beam-threshold", type=float, default=None)
+    parser.add_argument("--min-length", type=int, default=0, help="only benchmark sentences at least this long")
+    parser.add_argument("--snapshot", help="snapshot of the tagger trained on the training split")
+    parser.add_argument("--corpus-cache", help="corpus cache directory")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.dataset, cache_dir=args.corpus_cache)
+    train_sentences, train_tags, test_sentences, test_tags = split_corpus(corpus.sentences, corpus.tags,
+                                                                          args.holdout)
+
+    pos_tagger = None
+    if args.snapshot:
+        try:
+            pos_tagger = POSTagger.load(args.snapshot, training_data_hash(train_sentences, train_tags))
+        except (FileNotFoundError, StaleSnapshotError):
+            pass
+
+    if pos_tagger is None:
+        pos_tagger = POSTagger()
+        pos_tagger.train(train_sentences, train_tags)
+        if args.snapshot:
+            pos_tagger.save(args.snapshot)
+
+    long_sentences = [(sentence, tag_seq) for sentence, tag_seq in zip(test_sentences, test_tags)
+                      if len(sentence) >= args.min_length]
+    test_sentences = [sentence for sentence, _ in long_sentences]
+    test_tags = [tag_seq for _, tag_seq in long_sentences]
+
+    print(f"{len(test_sentences)} held-out sentences, {len(pos_tagger.tag_list)} tags")
+    print(f"{'beam':>6} {'accuracy':>9} {'agreement':>10} {'mean ms':>8} {'p50 ms':>7} {'p99 ms':>7}")
+    for beam_width, agreement, evaluation in benchmark_beam_widths(pos_tagger, test_sentences, test_tags,
+                                                                   [None] + args.beam_widths,
+                                                                   args.beam_threshold):
+        print(f"{'exact' if beam_width is None else beam_width:>6} {evaluation['accuracy']:>9.4f} {agreement:>10.4f} "
+              f"{evaluation['mean_ms']:>8.3f} {evaluation['p50_ms']:>7.3f} {evaluation['p99_ms']:>7.3f}")
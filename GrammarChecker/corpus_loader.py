@@ -0,0 +1,322 @@
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+import numpy as np
+
+from common.staging_directory import replace_directory
+
+# Corpus cache directory layout:
+#   meta.json     format version and SHA-1 of the corpus file the cache was built from
+#   words.json    word of every word id
+#   tags.json     tag of every tag id, in order of first appearance in the corpus
+#   word_ids.npy  int32 word id of every token, sentences stored one after the other
+#   tag_ids.npy   int32 tag id of every token
+#   offsets.npy   int64, the tokens of sentence i are in [offsets[i], offsets[i + 1])
+CACHE_VERSION = 1
+
+# Tagged corpus shipped with the package, found from this file so the scripts run from any directory
+DEFAULT_DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "POSTagDataset", "tagged_sentences.txt")
+
+_NON_LETTERS = re.compile(r'[^a-zA-Z]')
+
+
+def clean_tag(tag):
+    """
+    Keeps only the English letters of a tag and capitalizes them.
+    """
+    return _NON_LETTERS.sub('', tag).upper()
+
+
+def iter_tagged_sentences(file_path, start=0, end=None, report_errors=False):
+    """
+    Yields the (words, tags) sentences of a corpus with one "word tag" pair per line, reading it line by line.
+
+    A sentence ends at a word tagged FS. A line that is not a "word tag" pair drops the sentence it is in,
+    and the lines up to and including the next FS are skipped.
+
+    :param file_path: Tagged corpus file.
+    :param start: Byte offset of the first line to read, the start of a line.
+    :param end: Byte offset where reading stops, the start of a line. The end of the file when None.
+    :param report_errors: Print the lines that could not be processed.
+    """
+    sentence, tag_seq = [], []
+    skipping = False
+
+    # Tags repeat a lot, so they are only cleaned once
+    clean_tags = {}
+
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        position = start
+
+        for raw_line in f:
+            if end is not None and position >= end:
+                break
+            position += len(raw_line)
+
+            line = raw_line.decode('utf-8').rstrip('\r\n')
+            if not line.strip():
+                continue
+
+            try:
+                word, tag = line.split()
+            except ValueError as e:
+                if skipping:
+                    continue
+                if report_errors:
+                    print(f"Error processing line: {line}")
+                    print(e)
+                sentence, tag_seq = [], []
+                skipping = True
+                continue
+
+            if tag not in clean_tags:
+                clean_tags[tag] = clean_tag(tag)
+            tag = clean_tags[tag]
+
+            if skipping:
+                # Skip to the next full stop (FS)
+                skipping = tag != 'FS'
+                continue
+
+            sentence.append(word)
+            tag_seq.append(tag)
+
+            # Check for full stop (FS) to mark the end of a sentence
+            if tag == 'FS':
+                yield sentence, tag_seq
+                sentence, tag_seq = [], []
+
+    # Add the last sentence if not added
+    if sentence:
+        yield sentence, tag_seq
+
+
+def load_data(file_path, report_errors=False):
+    """
+    Returns the sentences of a tagged corpus as a list of word lists and a list of tag lists.
+    """
+    sentences, tags = [], []
+    for sentence, tag_seq in iter_tagged_sentences(file_path, report_errors=report_errors):
+        sentences.append(sentence)
+        tags.append(tag_seq)
+    return sentences, tags
+
+
+def shard_boundaries(file_path, shards):
+    """
+    Splits a corpus into byte ranges of about the same size. Every range but the last one ends right after
+    a line tagged FS, where the reader starts a fresh sentence whatever came before.
+
+    :return: List of byte offsets, shard i is [boundaries[i], boundaries[i + 1]).
+    """
+    size = os.path.getsize(file_path)
+    boundaries = [0]
+
+    with open(file_path, 'rb') as f:
+        for shard in range(1, shards):
+            target = size * shard // shards
+            if target <= boundaries[-1]:
+                continue
+
+            # Move to the start of the next line, then past the next FS line
+            f.seek(target)
+            f.readline()
+            boundary = size
+            for raw_line in iter(f.readline, b""):
+                fields = raw_line.decode('utf-8').split()
+                if len(fields) == 2 and clean_tag(fields[1]) == 'FS':
+                    boundary = f.tell()
+                    break
+
+            if boundary >= size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+
+    boundaries.append(size)
+    return boundaries
+
+
+class CorpusStatistics:
+    """
+    Word/tag, tag and tag bigram counts of a tagged corpus. Keys are kept in order of first appearance.
+    """
+
+    def __init__(self):
+        self.word_tags = Counter()
+        self.tags = Counter()
+        self.tag_bigrams = Counter()
+
+    def update(self, other):
+        """
+        Adds the counts of the statistics of a later part of the corpus.
+        """
+        self.word_tags.update(other.word_tags)
+        self.tags.update(other.tags)
+        self.tag_bigrams.update(other.tag_bigrams)
+
+    @classmethod
+    def from_sentences(cls, sentences, tags):
+        # Counted in one pass over all the sentences, the keys keep their first appearance order
+        statistics = cls()
+        statistics.word_tags.update(chain.from_iterable(map(zip, sentences, tags)))
+        statistics.tags.update(chain.from_iterable(tags))
+        statistics.tag_bigrams.update(chain.from_iterable(zip(tag_seq, tag_seq[1:]) for tag_seq in tags))
+        return statistics
+
+
+class TaggedCorpus:
+    """
+    Sentences of a tagged corpus with their statistics.
+    """
+
+    def __init__(self, sentences, tags, statistics):
+        self.sentences = sentences
+        self.tags = tags
+        self.statistics = statistics
+
+
+def _load_shard(file_path, start, end, report_errors):
+    sentences, tags = [], []
+    for sentence, tag_seq in iter_tagged_sentences(file_path, start, end, report_errors):
+        sentences.append(sentence)
+        tags.append(tag_seq)
+    return sentences, tags, CorpusStatistics.from_sentences(sentences, tags)
+
+
+def parse_corpus(file_path, workers=1, report_errors=False):
+    """
+    Parses and counts a tagged corpus, splitting it into shards handled by worker processes.
+    The result is the same as reading the corpus in one go.
+
+    :return: TaggedCorpus.
+    """
+    boundaries = shard_boundaries(file_path, workers) if workers > 1 else [0, None]
+    shards = [(file_path, start, end, report_errors) for start, end in zip(boundaries, boundaries[1:])]
+
+    if len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_load_shard, *zip(*shards)))
+    else:
+        results = [_load_shard(*shard) for shard in shards]
+
+    # Shards are merged in file order so the first appearance order of the keys is kept
+    corpus = TaggedCorpus([], [], CorpusStatistics())
+    for sentences, tags, statistics in results:
+        corpus.sentences.extend(sentences)
+        corpus.tags.extend(tags)
+        corpus.statistics.update(statistics)
+    return corpus
+
+
+def file_hash(file_path):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_corpus_cache(corpus, cache_dir, source_hash):
+    """
+    Writes the sentences of a corpus as integer word and tag id arrays.
+    """
+    word_index, tag_index = {}, {}
+    for sentence, tag_seq in zip(corpus.sentences, corpus.tags):
+        for word, tag in zip(sentence, tag_seq):
+            word_index.setdefault(word, len(word_index))
+            tag_index.setdefault(tag, len(tag_index))
+
+    word_ids = np.fromiter((word_index[word] for sentence in corpus.sentences for word in sentence), dtype=np.int32)
+    tag_ids = np.fromiter((tag_index[tag] for tag_seq in corpus.tags for tag in tag_seq), dtype=np.int32)
+    offsets = np.zeros(len(corpus.sentences) + 1, dtype=np.int64)
+    np.cumsum([len(sentence) for sentence in corpus.sentences], out=offsets[1:])
+
+    # The cache is swapped in when complete, a reader never sees new metadata next to old arrays
+    with replace_directory(cache_dir) as staging:
+        for name, array in (("word_ids", word_ids), ("tag_ids", tag_ids), ("offsets", offsets)):
+            np.save(os.path.join(staging, f"{name}.npy"), array)
+        for name, index in (("words", word_index), ("tags", tag_index)):
+            with open(os.path.join(staging, f"{name}.json"), 'w', encoding='utf-8') as f:
+                json.dump(list(index), f, ensure_ascii=False)
+        with open(os.path.join(staging, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "source_hash": source_hash}, f)
+
+
+def load_corpus_cache(cache_dir, source_hash=None):
+    """
+    Reads a corpus written by save_corpus_cache, counting its statistics on the id arrays.
+
+    :param source_hash: Expected SHA-1 of the corpus file, checked when given.
+    :return: TaggedCorpus, or None when there is no valid cache.
+    """
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get("version") != CACHE_VERSION or (source_hash is not None and meta["source_hash"] != source_hash):
+        return None
+
+    with open(os.path.join(cache_dir, "words.json"), 'r', encoding='utf-8') as f:
+        words = json.load(f)
+    with open(os.path.join(cache_dir, "tags.json"), 'r', encoding='utf-8') as f:
+        tag_names = json.load(f)
+    word_ids, tag_ids, offsets = (np.load(os.path.join(cache_dir, f"{name}.npy"))
+                                  for name in ("word_ids", "tag_ids", "offsets"))
+
+    # Token lists of every sentence
+    token_words = np.array(words, dtype=object)[word_ids].tolist()
+    token_tags = np.array(tag_names, dtype=object)[tag_ids].tolist()
+    bounds = offsets.tolist()
+    sentences = [token_words[start:end] for start, end in zip(bounds, bounds[1:])]
+    tags = [token_tags[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    num_tags = len(tag_names)
+    statistics = CorpusStatistics()
+
+    # Tag ids follow the first appearance order, so counting by id keeps the key order
+    tag_counts = np.bincount(tag_ids, minlength=num_tags)
+    statistics.tags.update({tag: int(count) for tag, count in zip(tag_names, tag_counts.tolist())})
+
+    pairs, counts = np.unique(word_ids.astype(np.int64) * num_tags + tag_ids, return_counts=True)
+    statistics.word_tags.update({(words[pair // num_tags], tag_names[pair % num_tags]): count
+                                 for pair, count in zip(pairs.tolist(), counts.tolist())})
+
+    # Bigrams inside sentences, every token but the first of its sentence follows another one
+    follows = np.ones(len(tag_ids), dtype=bool)
+    follows[offsets[:-1]] = False
+    bigrams = tag_ids[:-1].astype(np.int64)[follows[1:]] * num_tags + tag_ids[1:][follows[1:]]
+    pairs, counts = np.unique(bigrams, return_counts=True)
+    statistics.tag_bigrams.update({(tag_names[pair // num_tags], tag_names[pair % num_tags]): count
+                                   for pair, count in zip(pairs.tolist(), counts.tolist())})
+
+    return TaggedCorpus(sentences, tags, statistics)
+
+
+def load_corpus(file_path, workers=1, cache_dir=None, report_errors=False):
+    """
+    Loads a tagged corpus from its id array cache when the corpus file is unchanged, otherwise parses it with
+    the given number of worker processes and writes the cache.
+
+    :param file_path: Tagged corpus file.
+    :param workers: Number of processes parsing shards of the file.
+    :param cache_dir: Cache directory, no cache is used when None.
+    :param report_errors: Print the lines that could not be processed.
+    :return: TaggedCorpus.
+    """
+    if cache_dir is None:
+        return parse_corpus(file_path, workers, report_errors)
+
+    source_hash = file_hash(file_path)
+    corpus = load_corpus_cache(cache_dir, source_hash)
+    if corpus is None:
+        corpus = parse_corpus(file_path, workers, report_errors)
+        save_corpus_cache(corpus, cache_dir, source_hash)
+    return corpus
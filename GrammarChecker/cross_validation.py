@@ -0,0 +1,186 @@
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from .POSTagger import POS_Tagger
+from .POSTagger_HMC import POSTagger
+from .corpus_loader import load_corpus
+
+
+def _train_hmm(sentences, tags, **options):
+    pos_tagger = POSTagger(**options)
+    pos_tagger.train(sentences, tags)
+    return pos_tagger.predict
+
+
+def _train_hmm_cascade(sentences, tags):
+    return _train_hmm(sentences, tags, cascade=True)
+
+
+def _train_hmm_beam(sentences, tags, beam_width=4):
+    return _train_hmm(sentences, tags, beam_width=beam_width)
+
+
+def _train_rules(sentences, tags):
+    return POS_Tagger(sentences=sentences, tags=tags).tag_sentence
+
+
+# Tagger variants, each one trains on tagged sentences and returns a function tagging a sentence
+VARIANTS = {
+    "hmm": _train_hmm,
+    "hmm_cascade": _train_hmm_cascade,
+    "hmm_beam": _train_hmm_beam,
+    "rules": _train_rules,
+}
+
+
+def fold_bounds(num_sentences, folds):
+    """
+    Splits the sentences into contiguous folds of about the same size.
+    :return: List of (start, end) sentence ranges.
+    """
+    bounds = [num_sentences * fold // folds for fold in range(folds + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _peak_memory_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+
+def run_fold(dataset, corpus_cache, folds, fold, variant, options):
+    """
+    Trains a tagger variant on every fold but one and tags the sentences of the held-out fold.
+    Runs in its own process so the peak memory is the one of this fold.
+    :return: Dictionary of the fold's counts, latencies and timings.
+    """
+    corpus = load_corpus(dataset, cache_dir=corpus_cache)
+    start, end = fold_bounds(len(corpus.sentences), folds)[fold]
+    train_sentences = corpus.sentences[:start] + corpus.sentences[end:]
+    train_tags = corpus.tags[:start] + corpus.tags[end:]
+    test_sentences, test_tags = corpus.sentences[start:end], corpus.tags[start:end]
+
+    train_start = time.perf_counter()
+    predict = VARIANTS[variant](train_sentences, train_tags, **options)
+    train_seconds = time.perf_counter() - train_start
+
+    vocabulary = {word for sentence in train_sentences for word in sentence}
+    tag_totals, tag_correct = Counter(), Counter()
+    oov_total = oov_correct = 0
+    latencies = []
+
+    for sentence, tag_seq in zip(test_sentences, test_tags):
+        predict_start = time.perf_counter()
+        predicted_tags = predict(sentence)
+        latencies.append(time.perf_counter() - predict_start)
+
+        for word, predicted, tag in zip(sentence, predicted_tags, tag_seq):
+            tag_totals[tag] += 1
+            tag_correct[tag] += predicted == tag
+            if word not in vocabulary:
+                oov_total += 1
+                oov_correct += predicted == tag
+
+    return {
+        "fold": fold,
+        "sentences": len(test_sentences),
+        "train_seconds": train_seconds,
+        "tag_totals": dict(tag_totals),
+        "tag_correct": dict(tag_correct),
+        "oov_total": oov_total,
+        "oov_correct": oov_correct,
+        "latencies": latencies,
+        "peak_memory_mb": _peak_memory_mb(),
+    }
+
+
+def summarize(fold_results):
+    """
+    Combines the results of the folds of a variant into accuracy, speed and memory figures.
+    """
+    tag_totals, tag_correct = Counter(), Counter()
+    for result in fold_results:
+        tag_totals.update(result["tag_totals"])
+        tag_correct.update(result["tag_correct"])
+
+    oov_total = sum(result["oov_total"] for result in fold_results)
+    oov_correct = sum(result["oov_correct"] for result in fold_results)
+    latencies = np.array([latency for result in fold_results for latency in result["latencies"]])
+    total = sum(tag_totals.values())
+
+    return {
+        "accuracy": sum(tag_correct.values()) / total if total else 0.0,
+        "oov_accuracy": oov_correct / oov_total if oov_total else None,
+        "oov_tokens": oov_total,
+        "tag_accuracy": {tag: tag_correct[tag] / count for tag, count in sorted(tag_totals.items())},
+        "sentences_per_second": len(latencies) / latencies.sum() if latencies.sum() else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000 if len(latencies) else 0.0,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000 if len(latencies) else 0.0,
+        "train_seconds": float(np.mean([result["train_seconds"] for result in fold_results])),
+        "peak_memory_mb": max(result["peak_memory_mb"] for result in fold_results),
+        "folds": [{key: result[key] for key in ("fold", "sentences", "train_seconds", "peak_memory_mb")}
+                  for result in fold_results],
+    }
+
+
+def cross_validate(dataset, variants, folds=5, workers=1, corpus_cache=None, options=None):
+    """
+    Runs k-fold cross-validation of tagger variants, training and evaluating the folds in worker processes.
+    :param dataset: Tagged corpus file.
+    :param variants: Names of VARIANTS to evaluate.
+    :param folds: Number of folds.
+    :param workers: Number of processes running folds at the same time.
+    :param corpus_cache: Corpus cache directory shared by the processes, see load_corpus.
+    :param options: Dictionary of extra training options of each variant name.
+    :return: Dictionary of the summary of every variant.
+    """
+    options = options or {}
+
+    # Parse the corpus once so the processes read it from the cache
+    if corpus_cache is not None:
+        load_corpus(dataset, cache_dir=corpus_cache)
+
+    tasks = [(dataset, corpus_cache, folds, fold, variant, options.get(variant, {}))
+             for variant in variants for fold in range(folds)]
+
+    # Every fold gets a fresh process, otherwise the peak memory of a process covers several folds
+    with multiprocessing.Pool(workers, maxtasksperchild=1) as pool:
+        results = pool.starmap(run_fold, tasks, chunksize=1)
+
+    return {variant: summarize([result for task, result in zip(tasks, results) if task[4] == variant])
+            for variant in variants}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cross-validate the POS taggers and write the results as JSON")
+    parser.add_argument("dataset", help="tagged corpus")
+    parser.add_argument("--variants", nargs="+", choices=sorted(VARIANTS), default=sorted(VARIANTS))
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--beam-width", type=int, default=4, help="beam width of the hmm_beam variant")
+    parser.add_argument("--corpus-cache", help="corpus cache directory")
+    parser.add_argument("--output", help="JSON file the results are written to, printed when not given")
+    args = parser.parse_args()
+
+    summaries = cross_validate(args.dataset, args.variants, args.folds, args.workers, args.corpus_cache,
+                               {"hmm_beam": {"beam_width": args.beam_width}})
+    report = {"dataset": args.dataset, "folds": args.folds, "variants": summaries}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    for variant, summary in summaries.items():
+        print(f"{variant:>12} accuracy {summary['accuracy']:.4f}  oov {summary['oov_accuracy'] or 0:.4f}  "
+              f"{summary['sentences_per_second']:.0f} sentences/s  p50 {summary['p50_ms']:.3f} ms  "
+              f"p99 {summary['p99_ms']:.3f} ms  peak {summary['peak_memory_mb']:.0f} MB", file=sys.stderr)
@@ -0,0 +1,52 @@
+from collections import defaultdict
+
+# Agreement rules as (trigger word, tags of the words after it that must agree, suffix these words must end with)
+DEFAULT_GRAMMAR_RULES = (
+    # 'මම' followed by a 'VFM' or 'VP' word should end with 'මි'
+    ("මම", ("VFM", "VP"), "මි"),
+    # 'අපි' followed by a 'VFM' or 'VP' word should end with 'මු'
+    ("අපි", ("VFM", "VP"), "මු"),
+)
+
+
+# Index of the grammar rules by their trigger word
+class RuleIndex:
+
+    # Initialization method
+    def __init__(self, rules=DEFAULT_GRAMMAR_RULES):
+        """
+        :param rules: (trigger word, target tags, required suffix) rules, see DEFAULT_GRAMMAR_RULES
+        """
+        self.rules = tuple(rules)
+
+        # Every trigger word maps to the (tag, suffix) requirements it puts on the words after it
+        triggers = defaultdict(list)
+        for trigger, target_tags, suffix in self.rules:
+            triggers[trigger].extend((tag, suffix) for tag in target_tags)
+        self.triggers = dict(triggers)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def needs_tags(self, words):
+        """
+        Returns whether a trigger word has words after it, only then the POS tags of the sentence are needed.
+        """
+        return any(word in self.triggers for word in words[:-1])
+
+    def violates(self, words, tags):
+        """
+        Returns whether a word after a trigger word has one of the rule's tags without ending with its suffix.
+        The sentence is scanned once, whatever the number of rules.
+        """
+        # Suffixes required of every tag by the trigger words seen so far
+        required = {}
+        for word, tag in zip(words, tags):
+            for suffix in required.get(tag, ()):
+                if not word.endswith(suffix):
+                    return True
+
+            for target_tag, suffix in self.triggers.get(word, ()):
+                required.setdefault(target_tag, set()).add(suffix)
+
+        return False
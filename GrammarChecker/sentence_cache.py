@@ -0,0 +1,13 @@
+from common.lru_cache import LRUCache
+
+
+# Bounded LRU cache of the grammar check results of sentences, keyed on their normalized text and bound to the
+# version of the tagger and rules with set_version
+class SentenceCache(LRUCache):
+
+    @staticmethod
+    def normalize(words):
+        """
+        Returns the key of a sentence, its words separated by single spaces. The rules only see the words.
+        """
+        return " ".join(words)
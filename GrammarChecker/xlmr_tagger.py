@@ -0,0 +1,116 @@
+import torch
+from transformers import AutoTokenizer, XLMRobertaForTokenClassification
+
+
+class XLMRPOSTagger:
+    """
+    Batched CPU inference for a fine-tuned XLMRobertaForTokenClassification tagger, with the predict interface
+    of the HMM POSTagger.
+    """
+
+    def __init__(self, model_dir, batch_size=32, max_length=512, quantize=False, device="cpu"):
+        """
+        :param model_dir: Directory the model and its tokenizer were saved to with save_pretrained.
+        :param batch_size: Maximum number of sentences run through the model together.
+        :param max_length: Maximum number of subword tokens of a sentence, words after it are tagged UNK.
+        :param quantize: Run the linear layers with dynamic int8 quantization, CPU only.
+        :param device: Torch device the model runs on. The number of CPU threads is left to the application,
+                       see torch.set_num_threads.
+        """
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.device = torch.device(device)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = XLMRobertaForTokenClassification.from_pretrained(model_dir)
+        self.model.eval()
+
+        if quantize:
+            if self.device.type != "cpu":
+                raise ValueError("Dynamic int8 quantization only runs on the CPU")
+            self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model.to(self.device)
+
+        self.id2label = {int(label_id): label for label_id, label in self.model.config.id2label.items()}
+
+    def predict(self, sentence):
+        """
+        Predict the POS tags of a sentence.
+        :param sentence: List of words.
+        :return: List of predicted POS tags.
+        """
+        return self.predict_batch([sentence])[0]
+
+    def predict_batch(self, sentences):
+        """
+        Predict the POS tags of many sentences. Sentences are sorted by their number of subword tokens and
+        every batch is only padded to its longest sentence.
+        :param sentences: List of sentences (list of words).
+        :return: List of predicted POS tag sequences, in the order of the sentences.
+        """
+        results = [[] for _ in sentences]
+        indexes = [index for index, sentence in enumerate(sentences) if sentence]
+        if not indexes:
+            return results
+
+        encodings = self.tokenizer([sentences[index] for index in indexes], is_split_into_words=True,
+                                   truncation=True, max_length=self.max_length)
+        order = sorted(range(len(indexes)), key=lambda i: len(encodings["input_ids"][i]))
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            features = [{key: encodings[key][i] for key in encodings.keys()} for i in batch]
+            inputs = self.tokenizer.pad(features, padding=True, return_tensors="pt")
+            inputs = {key: value.to(self.device) for key, value in inputs.items()}
+
+            with torch.inference_mode():
+                predictions = self.model(**inputs).logits.argmax(dim=-1).tolist()
+
+            for i, token_labels in zip(batch, predictions):
+                sentence = sentences[indexes[i]]
+                if self.tokenizer.padding_side == "left":
+                    token_labels = token_labels[len(token_labels) - len(encodings["input_ids"][i]):]
+                tags = ["UNK"] * len(sentence)
+
+                # Every word takes the label of its first subword token
+                previous_word = None
+                for word_id, label_id in zip(encodings.word_ids(i), token_labels):
+                    if word_id is not None and word_id != previous_word:
+                        tags[word_id] = self.id2label[label_id]
+                    previous_word = word_id
+
+                results[indexes[i]] = tags
+
+        return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from .corpus_loader import DEFAULT_DATASET, load_data
+
+    parser = argparse.ArgumentParser(description="Measure the tagging throughput of a fine-tuned XLM-R tagger")
+    parser.add_argument("model_dir", help="directory the model and its tokenizer were saved to")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="tagged corpus whose sentences are tagged")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--quantize", action="store_true", help="dynamic int8 quantization of the linear layers")
+    parser.add_argument("--num-threads", type=int, help="number of threads used by torch, the torch default when "
+                                                        "not given")
+    args = parser.parse_args()
+
+    # The thread count is process wide, so it is set here rather than by the tagger
+    if args.num_threads is not None:
+        torch.set_num_threads(args.num_threads)
+
+    sentences, tags = load_data(args.dataset)
+    pos_tagger = XLMRPOSTagger(args.model_dir, batch_size=args.batch_size, quantize=args.quantize)
+
+    start = time.perf_counter()
+    predictions = pos_tagger.predict_batch(sentences)
+    elapsed = time.perf_counter() - start
+
+    correct = sum(predicted == tag for predicted_tags, tag_seq in zip(predictions, tags)
+                  for predicted, tag in zip(predicted_tags, tag_seq))
+    print(f"{len(sentences) / elapsed:.0f} sentences/s on {torch.get_num_threads()} threads, "
+          f"accuracy {correct / max(sum(map(len, tags)), 1):.4f}")
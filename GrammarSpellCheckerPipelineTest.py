@@ -9,8 +9,7 @@ class GrammarSpellChecker:
         self.grammar_checker = gc(POS_dataset)
 
     def correct_spelling(self, paragraph):
-        self.spell_checker.check(paragraph)
-        return self.spell_checker.correct()
+        return self.spell_checker.correct(paragraph)
 
     def detect_grammar_errors(self, paragraph):
         return self.grammar_checker.check_grammar(paragraph)
@@ -1,26 +1,171 @@
+import os
 import re
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 from Levenshtein import distance as levenshtein_distance
 
+from .compiled_dictionary import CompiledDictionary, is_compiled_dictionary
+from .confusion_index import DEFAULT_CONFUSION_SETS, ConfusionIndex
+from .correction_cache import CorrectionCache, dictionary_fingerprint
+from .dictionary_trie import DictionaryTrie
+from .match_order import push_match, ranked_positions, required_score
+from .ngram_model import NgramModel
+from .symspell_index import DeletionIndex
+
+# Spell checker of the current worker process, set up once by _init_worker
+_worker_spell_check = None
+
+
+def _init_worker(word_dict_file, dictionary, options):
+    global _worker_spell_check
+    _worker_spell_check = SpellCheck(word_dict_file, dictionary=dictionary, **options)
+
+
+def _correct_word_in_worker(word):
+    best_match, _ = _worker_spell_check.best_match(word, 50)
+    return best_match
+
+
+def _candidates_in_worker(word):
+    return _worker_spell_check._candidates(word, 50)
+
+
+def _read_chunks(file_path, read_size):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        while True:
+            chunk = file.read(read_size)
+            if not chunk:
+                break
+            yield chunk
+
+
 # Spellcheck main class
 class SpellCheck:
 
     # Initialization method
-    def __init__(self, word_dict_file=None):
+    def __init__(self, word_dict_file=None, backend="scan", max_edit_distance=2, cache_size=10000, cache_file=None,
+                 dictionary=None, confusion_sets=DEFAULT_CONFUSION_SETS, language_model=None, rerank_margin=5,
+                 rerank_candidates=5, parallel_min_words=512):
+        """
+        :param word_dict_file: comma separated dictionary file, or a dictionary compiled with compile_dictionary
+        :param backend: "scan" compares every dictionary word, "symspell" looks candidates up in a
+                        precomputed symmetric deletion index and "trie" stores the dictionary in a
+                        compact trie searched with a bounded edit distance. All return the same best matches.
+                        The trie is a memory option (7.4 MB instead of 9.9 MB for the 101k word dictionary),
+                        words more than one edit from the dictionary take about as long as with "scan"
+        :param max_edit_distance: largest edit distance resolved through the symspell index
+        :param cache_size: maximum number of cached corrections, 0 disables the cache
+        :param cache_file: optional file the correction cache is loaded from and saved to with save_cache()
+        :param dictionary: already loaded dictionary words, used in the given order instead of word_dict_file
+        :param confusion_sets: groups of commonly confused characters. A word that only differs from dictionary
+                               words by these characters is corrected through an O(1) skeleton lookup before
+                               the fuzzy search, None disables the lookup
+        :param language_model: n-gram model directory written by build_ngram_model, or a loaded NgramModel.
+                               When given, the best match of a misspelled word competes with the other
+                               matches scoring within rerank_margin of it, and the one fitting the
+                               neighbouring words best is chosen
+        :param rerank_margin: largest score difference (0 - 100) of a match reranked against the best match
+        :param rerank_candidates: number of matches considered for reranking
+        :param parallel_min_words: fewest unique words sent to the worker processes, smaller inputs are corrected
+                                   in this process
+        """
         self.string_to_check = None
 
-        # Open the dictionary file
-        self.file = open(word_dict_file, 'r', encoding='utf-8')
+        # Worker process pools by number of workers, created on first use and kept until close()
+        self.parallel_min_words = parallel_min_words
+        self._pools = {}
+        self._pool_lock = threading.Lock()
+
+        if backend not in ("scan", "symspell", "trie"):
+            raise ValueError(f"Unknown spell check backend: {backend}")
+        self.backend = backend
+        self.max_edit_distance = max_edit_distance
+        self.confusion_sets = confusion_sets
+
+        if isinstance(language_model, (str, os.PathLike)):
+            language_model = NgramModel(language_model)
+        self.language_model = language_model
+        self.rerank_margin = rerank_margin
+        self.rerank_candidates = rerank_candidates
+
+        # Number of words resolved by each correction tier
+        self.tier_counts = Counter()
+        self.tier_lock = threading.Lock()
+
+        # Cache of the best matches, bound to the dictionary when it is set
+        self.cache = CorrectionCache(cache_size, cache_file)
 
-        # Load the file data into a variable
-        data = self.file.read()
+        # Options the worker processes of a parallel correction are created with
+        self.worker_options = {"backend": backend, "max_edit_distance": max_edit_distance, "cache_size": cache_size,
+                               "confusion_sets": confusion_sets,
+                               "language_model": None if language_model is None else language_model.path,
+                               "rerank_margin": rerank_margin, "rerank_candidates": rerank_candidates}
 
-        # Store all the words in a list
-        data = data.split(",")
+        if dictionary is None and is_compiled_dictionary(word_dict_file):
+            # Memory map the precompiled dictionary, the words are already normalized
+            dictionary = CompiledDictionary(word_dict_file)
+        elif dictionary is None:
+            # Open the dictionary file
+            self.file = open(word_dict_file, 'r', encoding='utf-8')
 
-        # Change all the words to lowercase and remove duplicates
-        data = [i.lower() for i in data]
-        self.dictionary = list(set(data))
+            # Load the file data into a variable
+            data = self.file.read()
+
+            # Store all the words in a list
+            data = data.split(",")
+
+            # Change all the words to lowercase and remove duplicates, keeping the file order so the scan order,
+            # its tie-breaks and the cache fingerprint are the same in every process
+            data = [i.lower() for i in data]
+            dictionary = list(dict.fromkeys(data))
+
+        self.dictionary = dictionary
+
+    @property
+    def dictionary(self):
+        """
+        Dictionary words in scan order. The indexes, known words and correction cache are rebuilt when a new
+        dictionary is assigned or add_words() is called, changing the word list in place leaves them stale.
+        """
+        return self._dictionary
+
+    @dictionary.setter
+    def dictionary(self, words):
+        # The workers of the pools hold the previous dictionary
+        self.close()
+
+        # Cached corrections are only valid for the dictionary they were computed with
+        fingerprint = dictionary_fingerprint(words)
+
+        # Skeletons are computed from the word list, before it is replaced by a trie
+        self.confusion_index = None
+        if self.confusion_sets is not None:
+            self.confusion_index = ConfusionIndex(words, self.confusion_sets)
+
+        # Build the candidate index once, if requested
+        self.index = None
+        if self.backend == "symspell":
+            self.index = DeletionIndex(words, self.max_edit_distance)
+        elif self.backend == "trie":
+            # The trie replaces the word list to keep the memory footprint small
+            if not isinstance(words, DictionaryTrie):
+                words = DictionaryTrie(words)
+            self.index = words
+
+        self._dictionary = words
+        self.length_buckets = None
+
+        # Known words skip the fuzzy search, a plain list needs a set for O(1) membership checks
+        self.known_words = set(words) if isinstance(words, list) else words
+
+        self.cache.set_fingerprint(fingerprint)
+
+    # This method adds words to the end of the dictionary and rebuilds everything derived from it
+    def add_words(self, words):
+        words = [word.lower() for word in words]
+        self.dictionary = list(dict.fromkeys([*self.dictionary, *words]))
 
     def levenshtein_heuristic(self, word1, word2):
         """
@@ -38,33 +183,106 @@ class SpellCheck:
         score = (1 - (distance / max_len)) * 100
         return score
 
-    # String setter method
+    # This method returns the best dictionary match of a word and its score
+    def best_match(self, word, threshold):
+        # A word that is already in the dictionary is its own best match
+        if word in self.known_words:
+            self._count_tier("known")
+            return word, self.levenshtein_heuristic(word, word)
+
+        # Most misspellings only confuse similar characters, those are found without searching
+        if self.confusion_index is not None:
+            result = self.confusion_index.best_match(word, threshold, self.levenshtein_heuristic)
+            if result[0] is not None:
+                self._count_tier("skeleton")
+                return result
+
+        # Reuse the result of an earlier search for the same word
+        self._count_tier("fuzzy")
+        result = self.cache.get((word, threshold))
+        if result is None:
+            result = self._search_best_match(word, threshold)
+            self.cache.put((word, threshold), result)
+
+        return result
+
+    def _count_tier(self, tier):
+        with self.tier_lock:
+            self.tier_counts[tier] += 1
+
+    # This method reports how many words were resolved by each correction tier
+    def tier_stats(self):
+        """
+        Words corrected by worker processes are counted in the workers, not here.
+
+        :return: {"known": {"count", "rate"}, "skeleton": {...}, "fuzzy": {...}}, fuzzy includes cached results
+        """
+        with self.tier_lock:
+            total = sum(self.tier_counts.values())
+            return {tier: {"count": self.tier_counts[tier], "rate": self.tier_counts[tier] / total if total else 0.0}
+                    for tier in ("known", "skeleton", "fuzzy")}
+
+    # This method searches the dictionary for the best match of a word
+    def _search_best_match(self, word, threshold):
+        # Look the candidates up in the index instead of scanning the whole dictionary
+        if self.index is not None:
+            return self.index.best_match(word, threshold, self.levenshtein_heuristic)
+
+        best_match = None
+        best_score = 0
+
+        # Loop over the words in the dictionary
+        for name in self.dictionary:
+            # Calculate the match probability using Levenshtein heuristic
+            score = self.levenshtein_heuristic(word, name)
+
+            # If the score is greater than the current best_score and above the threshold
+            if score >= threshold and score > best_score:
+                best_match = name
+                best_score = score
+
+        return best_match, best_score
+
+    # This method returns the best match of a word followed by the near ties the language model chooses from
+    def _candidates(self, word, threshold):
+        best_match, best_score = self.best_match(word, threshold)
+
+        # Known words and words without a match are left as they are
+        if best_match is None or best_match == word:
+            return [best_match]
+
+        # Only the matches within the margin are searched for
+        near_threshold = max(threshold, best_score - self.rerank_margin)
+        near_matches = self.best_matches(word, self.rerank_candidates, near_threshold)
+
+        candidates = [best_match]
+        for match, _ in near_matches:
+            if match not in candidates:
+                candidates.append(match)
+
+        return candidates
+
+    # This method writes the correction cache to its file so it survives restarts
+    def save_cache(self):
+        self.cache.save()
+
+    # String setter method, kept for the check() then correct() protocol
     def check(self, string_to_check):
         # Store the string to be checked in a class variable
         self.string_to_check = string_to_check
 
     # This method returns the possible suggestions of the correct words
-    def suggestions(self):
+    def suggestions(self, text=None):
         # Store the words of the string to be checked in a list by using a split function
-        string_words = self.string_to_check.split()
+        string_words = (self.string_to_check if text is None else text).split()
 
         # A list to store all the possible suggestions
         suggestions = []
 
         # Loop over the number of words in the string to be checked
         for i in range(len(string_words)):
-            best_match = None
-            best_score = 0
-
-            # Loop over words in the dictionary
-            for name in self.dictionary:
-                # Calculate the match score using Levenshtein heuristic
-                score = self.levenshtein_heuristic(string_words[i].lower(), name.lower())
-
-                # If the score is greater than the current best_score, update the best match
-                if score >= 70 and score > best_score:  # Lowered threshold for more matches
-                    best_match = name
-                    best_score = score
+            # Find the best dictionary match using the Levenshtein heuristic
+            best_match, _ = self.best_match(string_words[i].lower(), 70)  # Lowered threshold for more matches
 
             # If a valid suggestion is found (best_match is not None), append it to the list
             if best_match:
@@ -73,41 +291,315 @@ class SpellCheck:
         # Return the suggestions list
         return suggestions
 
-    # This method returns the corrected string of the given input
-    def correct(self):
+    # This method groups the dictionary positions by word length for the linear scan, built on first use
+    def _length_buckets(self):
+        if self.length_buckets is None:
+            if isinstance(self.dictionary, CompiledDictionary):
+                # A compiled dictionary is already sorted by length
+                words = list(self.dictionary)
+                buckets = {length: self.dictionary.length_range(length)
+                           for length in range(self.dictionary.max_length + 1)}
+            else:
+                words = self.dictionary if isinstance(self.dictionary, list) else list(self.dictionary)
+                buckets = defaultdict(list)
+                for position, word in enumerate(words):
+                    buckets[len(word)].append(position)
+
+            self.length_buckets = (words, dict(buckets))
+
+        return self.length_buckets
+
+    # This method returns the k best dictionary matches of a word with their scores
+    def best_matches(self, word, k=5, threshold=70):
+        """
+        Ranks the dictionary words by Levenshtein heuristic, ties are ordered like the linear scan.
+
+        The symspell and trie backends search their index. Without one, a word of length l differs from the
+        given word in at least |l - len(word)| characters, which bounds the score of a whole length bucket.
+        Buckets are visited from the highest bound down and the search stops once no bucket can reach the
+        threshold or enter the heap of the k best matches.
+
+        :param word: lowercase word to look up
+        :param k: maximum number of matches returned
+        :param threshold: minimum score (0 - 100) of a match
+        :return: list of (match, score), best first
+        """
+        if k <= 0:
+            return []
+
+        if self.index is not None:
+            return self.index.matches(word, k, threshold, self.levenshtein_heuristic)
+
+        words, buckets = self._length_buckets()
+        m = len(word)
+
+        def score_bound(length):
+            max_len = max(m, length)
+            return (1 - (abs(m - length) / max_len)) * 100 if max_len else 100
+
+        # Min heap of (score, -position) holding the k best matches found so far
+        heap = []
+
+        for length in sorted(buckets, key=score_bound, reverse=True):
+            if score_bound(length) + 1e-9 < required_score(heap, k, threshold):
+                break
+
+            for position in buckets[length]:
+                score = self.levenshtein_heuristic(word, words[position])
+                if score >= threshold:
+                    push_match(heap, k, score, position)
+
+        return [(words[position], score) for position, score in ranked_positions(heap)]
+
+    # This method returns the ranked suggestions of every word in the string to be checked
+    def ranked_suggestions(self, text=None, k=5, threshold=70):
+        """
+        Unlike suggestions(), every whitespace separated token gets an entry, even when nothing matches it.
+
+        :param text: text to check, the string given to check() when omitted
+        :param k: maximum number of suggestions per token
+        :param threshold: minimum score (0 - 100) of a suggestion
+        :return: list of {"token", "start", "end", "suggestions": [(word, score), ...]} in token order
+        """
+        ranked = []
+
+        for match in re.finditer(r'\S+', self.string_to_check if text is None else text):
+            ranked.append({
+                "token": match.group(),
+                "start": match.start(),
+                "end": match.end(),
+                "suggestions": self.best_matches(match.group().lower(), k, threshold),
+            })
+
+        return ranked
+
+    # This method returns the process pool used by parallel corrections, the workers set up their index only once
+    def _worker_pool(self, workers):
+        with self._pool_lock:
+            if workers not in self._pools:
+                # A compiled dictionary is memory mapped again by every worker, other dictionaries are sent as they
+                # are so the workers scan the words in the same order and break ties the same way
+                if isinstance(self.dictionary, CompiledDictionary):
+                    worker_dictionary = (self.dictionary.path, None)
+                else:
+                    worker_dictionary = (None, self.dictionary)
+
+                self._pools[workers] = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                           initargs=(*worker_dictionary, self.worker_options))
+
+            return self._pools[workers]
+
+    # This method shuts the worker processes down, the next parallel correction starts new ones
+    def close(self):
+        with self._pool_lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+
+        for pool in pools:
+            pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # This method splits a text into words, punctuation, and whitespace
+    @staticmethod
+    def _tokenize(text):
         # Use regex to split into words, punctuation, and whitespace, accounting for Unicode characters
         # Updated regex to account for Sinhala characters as well
-        tokens = re.findall(r'[\w\'\u0D80-\u0DFF]+|[^\w\s]|\s+', self.string_to_check, re.UNICODE)
+        return re.findall(r'[\w\'\u0D80-\u0DFF]+|[^\w\s]|\s+', text, re.UNICODE)
+
+    @staticmethod
+    def _is_word(token):
+        return re.match(r'[\w\'\u0D80-\u0DFF]+', token, re.UNICODE) is not None  # Match Sinhala and other Unicode words
+
+    # This method finds the best match of every unique word, with the worker processes if there are any
+    def _correct_words(self, words, workers=1, chunksize=64, show_progress=False):
+        # Sending a few words to the workers costs more than correcting them here
+        executor = None
+        if workers > 1 and len(words) >= self.parallel_min_words:
+            executor = self._worker_pool(workers)
+
+        # With a language model every word maps to its candidate list, the choice depends on the context
+        if self.language_model is not None:
+            if executor is not None:
+                best_matches = executor.map(_candidates_in_worker, words, chunksize=chunksize)
+            else:
+                best_matches = (self._candidates(word, 50) for word in words)
+        elif executor is not None:
+            best_matches = executor.map(_correct_word_in_worker, words, chunksize=chunksize)
+        else:
+            # Find the best dictionary match using the Levenshtein heuristic
+            best_matches = (self.best_match(word, 50)[0] for word in words)  # Lowered threshold for more matches
+
+        if show_progress:
+            # The bar is exhausted before zipping, zip stops on the words and would leave the bar one short
+            best_matches = list(tqdm(best_matches, "Correcting words: ", total=len(words)))
+
+        return dict(zip(words, best_matches))
+
+    # This method replaces the words of a token list with their best matches
+    def _assemble(self, tokens, best_matches, previous_word=None, next_word=None):
+        """
+        The language model context of a word is the words around it as they were written, so the result
+        does not depend on the order the words are corrected in.
 
+        :param previous_word: word before the tokens, used as context by the language model
+        :param next_word: word after the tokens, used as context by the language model
+        """
         # List to hold corrected tokens
         corrected_tokens = []
 
-        for token in tqdm(tokens, "Correcting words: "):
+        # Lowercase words, padded with the context words
+        words = [previous_word] + [token.lower() for token in tokens if self._is_word(token)] + [next_word]
+        word_number = 0
+
+        for token in tokens:
             # Check if the token is a word (not punctuation or whitespace)
-            if re.match(r'[\w\'\u0D80-\u0DFF]+', token, re.UNICODE):  # Match Sinhala and other Unicode words
-                best_match = None
-                best_score = 0
-
-                # Loop over the words in the dictionary
-                for name in self.dictionary:
-                    # Calculate the match probability using Levenshtein heuristic
-                    score = self.levenshtein_heuristic(token.lower(), name.lower())
-
-                    # If the score is greater than the current best_score and above the threshold
-                    if score >= 50 and score > best_score:  # Lowered threshold for more matches
-                        best_match = name
-                        best_score = score
-
-                # If a valid best match is found, update the token
-                if best_match:
-                    corrected_tokens.append(best_match)
-                else:
-                    corrected_tokens.append(token)  # No match, keep the original word
+            if not self._is_word(token):
+                corrected_tokens.append(token)
+                continue
+
+            word_number += 1
+            best_match = best_matches.get(words[word_number])
+
+            # Choose between the near ties with the neighbouring words
+            if self.language_model is not None:
+                candidates = best_match
+                best_match = candidates[0]
+                if len(candidates) > 1:
+                    best_match = self.language_model.rerank(candidates, words[word_number - 1],
+                                                            words[word_number + 1])
+
+            # If a valid best match is found, update the token
+            if best_match:
+                corrected_tokens.append(best_match)
             else:
-                # If the token is not a word (punctuation or whitespace), keep it as is
+                # No match: keep the original token
                 corrected_tokens.append(token)
 
         # Return the corrected string by joining the tokens
-        corrected_string = "".join(corrected_tokens)
+        return "".join(corrected_tokens)
+
+    # This method corrects the words of a text, keeping punctuation and whitespace as they are
+    def _correct_text(self, text, workers=1, chunksize=64, show_progress=False, previous_word=None,
+                      next_word=None):
+        tokens = self._tokenize(text)
+
+        # Correct every unique word once
+        words = list(dict.fromkeys(token.lower() for token in tokens if self._is_word(token)))
+        best_matches = self._correct_words(words, workers, chunksize, show_progress)
+
+        return self._assemble(tokens, best_matches, previous_word, next_word)
+
+    # This method returns the corrected string of the given input
+    def correct(self, text=None, workers=1, chunksize=64, show_progress=False):
+        """
+        Safe to call from several threads on a shared instance when the text is passed in.
+
+        :param text: text to correct, the string given to check() when omitted
+        :param workers: number of worker processes, 1 corrects the words in this process. The processes are kept
+                        for later calls until close()
+        :param chunksize: number of unique words sent to a worker at a time
+        :param show_progress: show a progress bar over the unique words of the text on stderr
+        """
+        if text is None:
+            text = self.string_to_check
+
+        return self._correct_text(text, workers, chunksize, show_progress)
+
+    # This method returns the corrected strings of a batch of texts
+    def correct_many(self, texts, workers=1, chunksize=64):
+        """
+        Corrects a batch of texts, scoring every unique word of the whole batch only once.
+        Safe to call from several threads on a shared instance.
+
+        :param texts: iterable of texts to correct
+        :param workers: number of worker processes, 1 corrects the words in this process. The processes are kept
+                        for later calls until close()
+        :param chunksize: number of unique words sent to a worker at a time
+        :return: list of corrected texts, in the order of the input
+        """
+        token_lists = [self._tokenize(text) for text in texts]
+
+        # Collect the unique words across the entire batch
+        words = list(dict.fromkeys(token.lower() for tokens in token_lists for token in tokens if self._is_word(token)))
+
+        best_matches = self._correct_words(words, workers, chunksize)
+
+        return [self._assemble(tokens, best_matches) for tokens in token_lists]
+
+    # This method yields the corrected text of a file or of an iterable of text chunks
+    def correct_stream(self, source, workers=1, chunksize=64, read_size=65536):
+        """
+        Corrects the text piece by piece, so only about one chunk is held in memory at a time.
+
+        :param source: path of a UTF-8 text file, or an iterable of text chunks
+        :param workers: number of worker processes, 1 corrects the words in this process. The processes are kept
+                        for later calls until close()
+        :param chunksize: number of unique words sent to a worker at a time
+        :param read_size: number of characters read from the file at a time
+        :return: generator of corrected text pieces, which joined give the same result as correct()
+        """
+        if isinstance(source, (str, os.PathLike)):
+            source = _read_chunks(source, read_size)
+
+        pending = ""
+        previous_word = None
+        for chunk in source:
+            pending += chunk
+
+            # A word touching the end of the buffer may continue in the next chunk, so it is held back
+            words = list(re.finditer(r'[\w\'\u0D80-\u0DFF]+', pending, re.UNICODE))
+            split_index = len(pending)
+            if words and words[-1].end() == len(pending):
+                split_index = words.pop().start()
+
+            # With a language model the last complete word is held back too, as the next word of the piece
+            next_word = None
+            if self.language_model is not None and words:
+                split_index = words[-1].start()
+                next_word = words.pop().group().lower()
+
+            if split_index > 0:
+                yield self._correct_text(pending[:split_index], workers, chunksize, previous_word=previous_word,
+                                         next_word=next_word)
+                pending = pending[split_index:]
+                if words:
+                    previous_word = words[-1].group().lower()
+
+        if pending:
+            yield self._correct_text(pending, workers, chunksize, previous_word=previous_word)
+
+
+# Stream the text from stdin to stdout, correcting it on the way
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Correct the spelling of the text read from stdin")
+    parser.add_argument("word_dict_file", help="comma separated or compiled dictionary file")
+    parser.add_argument("--backend", default="scan", choices=["scan", "symspell", "trie"])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunksize", type=int, default=64)
+    parser.add_argument("--language-model", help="n-gram model directory used to rerank near tie corrections")
+    parser.add_argument("--stats", action="store_true", help="print the hit rate of each correction tier to stderr")
+    args = parser.parse_args()
+
+    sys.stdin.reconfigure(encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    spell_check = SpellCheck(args.word_dict_file, backend=args.backend, language_model=args.language_model)
+
+    # Lines are read with a length limit so a single long line does not have to fit in memory
+    chunks = iter(lambda: sys.stdin.readline(65536), "")
+    with spell_check:
+        for corrected_text in spell_check.correct_stream(chunks, workers=args.workers, chunksize=args.chunksize):
+            sys.stdout.write(corrected_text)
+            sys.stdout.flush()
 
-        return corrected_string
+    if args.stats:
+        for tier, tier_stats in spell_check.tier_stats().items():
+            print(f"{tier}: {tier_stats['count']} words ({tier_stats['rate']:.1%})", file=sys.stderr)
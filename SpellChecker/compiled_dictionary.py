@@ -0,0 +1,150 @@
+import mmap
+import struct
+import sys
+import zlib
+
+# File layout (little endian):
+#   header        magic, version, word count, hash table size, longest word length
+#   offsets       (word count + 1) uint32 byte offsets of the words in the data block
+#   length starts (longest word length + 2) uint32 index of the first word of each length
+#   hash table    (hash table size) uint32 word index + 1, 0 for an empty slot
+#   data          normalized UTF-8 words, deduplicated, sorted by length and each followed by a comma
+MAGIC = b"SSCD"
+VERSION = 1
+HEADER = struct.Struct("<4sIIII")
+
+
+def _slot(encoded_word, table_size):
+    return zlib.crc32(encoded_word) & (table_size - 1)
+
+
+def compile_dictionary(word_dict_file, compiled_file):
+    """
+    Compiles a comma separated dictionary file into the binary format read by CompiledDictionary.
+    The words are lowercased, deduplicated and sorted by length.
+
+    :param word_dict_file: comma separated dictionary file
+    :param compiled_file: path of the binary dictionary to write
+    :return: number of words written
+    """
+    with open(word_dict_file, 'r', encoding='utf-8') as file:
+        words = sorted(set(word.lower() for word in file.read().split(",")), key=lambda word: (len(word), word))
+
+    encoded_words = [word.encode('utf-8') + b"," for word in words]
+    max_length = len(words[-1]) if words else 0
+
+    # Byte offsets of the words in the data block
+    offsets = [0]
+    for encoded_word in encoded_words:
+        offsets.append(offsets[-1] + len(encoded_word))
+
+    # Index of the first word of every length, words of length l are in [starts[l], starts[l + 1])
+    length_starts = [0] * (max_length + 2)
+    for word in words:
+        length_starts[len(word) + 1] += 1
+    for length in range(1, max_length + 2):
+        length_starts[length] += length_starts[length - 1]
+
+    # Open addressing hash table for membership checks
+    table_size = 1
+    while table_size < 2 * len(words):
+        table_size *= 2
+
+    table = [0] * table_size
+    for index, encoded_word in enumerate(encoded_words):
+        slot = _slot(encoded_word[:-1], table_size)
+        while table[slot]:
+            slot = (slot + 1) & (table_size - 1)
+        table[slot] = index + 1
+
+    with open(compiled_file, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(words), table_size, max_length))
+        file.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        file.write(struct.pack(f"<{len(length_starts)}I", *length_starts))
+        file.write(struct.pack(f"<{table_size}I", *table))
+        file.write(b"".join(encoded_words))
+
+    return len(words)
+
+
+def is_compiled_dictionary(word_dict_file):
+    with open(word_dict_file, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+# Read only dictionary backed by a memory mapped compiled file
+class CompiledDictionary:
+
+    # Initialization method
+    def __init__(self, compiled_file):
+        self.path = compiled_file
+        with open(compiled_file, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if sys.byteorder != "little":
+            raise ValueError("Compiled dictionaries can only be memory mapped on little endian machines")
+
+        magic, version, self.word_count, self.table_size, self.max_length = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{compiled_file} is not a compiled dictionary of version {VERSION}")
+
+        # The tables are used in place, no word is parsed while loading
+        view = memoryview(self.buffer)
+        position = HEADER.size
+        self.offsets = view[position:position + 4 * (self.word_count + 1)].cast('I')
+        position += 4 * (self.word_count + 1)
+        self.length_starts = view[position:position + 4 * (self.max_length + 2)].cast('I')
+        position += 4 * (self.max_length + 2)
+        self.table = view[position:position + 4 * self.table_size].cast('I')
+        position += 4 * self.table_size
+        self.data = view[position:]
+
+        # Decoded word list, only built when the whole dictionary is iterated
+        self.words = None
+
+    def __len__(self):
+        return self.word_count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.word_count
+        if not 0 <= index < self.word_count:
+            raise IndexError("dictionary index out of range")
+        return str(self.data[self.offsets[index]:self.offsets[index + 1] - 1], 'utf-8')
+
+    def __iter__(self):
+        # Full scans decode the data block in one go instead of one word at a time
+        if self.words is None:
+            self.words = str(self.data, 'utf-8').split(",")[:-1]
+        return iter(self.words)
+
+    def __contains__(self, word):
+        # O(1) membership check through the hash table
+        encoded_word = word.encode('utf-8')
+        slot = _slot(encoded_word, self.table_size)
+        while self.table[slot]:
+            index = self.table[slot] - 1
+            if self.data[self.offsets[index]:self.offsets[index + 1] - 1] == encoded_word:
+                return True
+            slot = (slot + 1) & (self.table_size - 1)
+        return False
+
+    def length_range(self, length):
+        """
+        Returns the range of indexes of the words with the given length.
+        """
+        if length > self.max_length:
+            return range(self.word_count, self.word_count)
+        return range(self.length_starts[length], self.length_starts[length + 1])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile a comma separated dictionary for memory mapped loading")
+    parser.add_argument("word_dict_file")
+    parser.add_argument("compiled_file")
+    args = parser.parse_args()
+
+    count = compile_dictionary(args.word_dict_file, args.compiled_file)
+    print(f"Compiled {count} words into {args.compiled_file}")
@@ -0,0 +1,85 @@
+from collections import defaultdict
+
+# Groups of characters that are commonly typed in place of each other. The first character of a group is
+# the one every other character of the group is normalized to, an empty first character removes them.
+DEFAULT_CONFUSION_SETS = (
+    ("න", "ණ"),
+    ("ල", "ළ"),
+    ("ශ", "ෂ"),
+    # Short and long independent vowels
+    ("අ", "ආ"),
+    ("ඇ", "ඈ"),
+    ("ඉ", "ඊ"),
+    ("උ", "ඌ"),
+    ("එ", "ඒ"),
+    ("ඔ", "ඕ"),
+    # Short and long vowel signs
+    ("\u0DD0", "\u0DD1"),  # ැ ෑ
+    ("\u0DD2", "\u0DD3"),  # ි ී
+    ("\u0DD4", "\u0DD6"),  # ු ූ
+    ("\u0DD9", "\u0DDA"),  # ෙ ේ
+    ("\u0DDC", "\u0DDD"),  # ො ෝ
+    ("\u0DD8", "\u0DF2"),  # ෘ ෲ
+    # Hal kirīma and the zero width joiner of conjuncts are often left out
+    ("", "\u0DCA", "\u200D"),
+)
+
+
+def build_translation_table(confusion_sets):
+    """
+    Returns the str.translate table mapping every confusable character to its group's normalized form.
+    """
+    table = {}
+    for confusion_set in confusion_sets:
+        normalized = confusion_set[0] or None
+        for character in confusion_set:
+            if character:
+                table[ord(character)] = normalized
+    return table
+
+
+# Index of the dictionary words by their confusion normalized skeleton
+class ConfusionIndex:
+
+    # Initialization method
+    def __init__(self, words, confusion_sets=DEFAULT_CONFUSION_SETS):
+        """
+        :param words: dictionary words, in the order the linear scan visits them
+        :param confusion_sets: groups of confusable characters, see DEFAULT_CONFUSION_SETS
+        """
+        self.confusion_sets = confusion_sets
+        self.table = build_translation_table(confusion_sets)
+
+        # Every skeleton maps to its dictionary words in scan order
+        skeletons = defaultdict(list)
+        for word in words:
+            skeletons[self.skeleton(word)].append(word)
+        self.skeletons = dict(skeletons)
+
+    def __len__(self):
+        return len(self.skeletons)
+
+    def skeleton(self, word):
+        return word.translate(self.table)
+
+    def candidates(self, word):
+        """
+        Returns the dictionary words that only differ from the word by confusable characters.
+        """
+        return self.skeletons.get(self.skeleton(word), [])
+
+    def best_match(self, word, threshold, score_function):
+        """
+        Returns the best scoring word among the skeleton candidates, keeping the first one on ties like
+        the linear scan, or (None, 0) when no candidate reaches the threshold.
+        """
+        best_match = None
+        best_score = 0
+
+        for candidate in self.candidates(word):
+            score = score_function(word, candidate)
+            if score >= threshold and score > best_score:
+                best_match = candidate
+                best_score = score
+
+        return best_match, best_score
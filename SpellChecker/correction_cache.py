@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+
+from common.lru_cache import LRUCache
+from .compiled_dictionary import CompiledDictionary
+
+CACHE_FORMAT_VERSION = 1
+
+
+def dictionary_fingerprint(words):
+    """
+    Returns a hash of the dictionary words in scan order, which is what a cached best match depends on.
+    """
+    digest = hashlib.sha1()
+
+    # A compiled dictionary stores exactly these bytes, so it is hashed without decoding the words
+    if isinstance(words, CompiledDictionary):
+        digest.update(words.data)
+        return digest.hexdigest()
+
+    for word in words:
+        digest.update(word.encode('utf-8'))
+        digest.update(b",")
+    return digest.hexdigest()
+
+
+# Bounded LRU cache of best matches keyed on (normalized token, threshold), bound to the dictionary fingerprint
+class CorrectionCache(LRUCache):
+
+    # Initialization method
+    def __init__(self, max_size=10000, path=None):
+        """
+        :param max_size: maximum number of cached corrections, 0 disables the cache
+        :param path: optional JSON file the cache is loaded from and saved to
+        """
+        super().__init__(max_size)
+        self.path = path
+
+    @property
+    def fingerprint(self):
+        return self.version
+
+    def set_fingerprint(self, fingerprint):
+        """
+        Binds the cache to a dictionary. Entries computed with a different dictionary are dropped, and a
+        persisted cache is only loaded when it was saved for the same dictionary.
+        """
+        with self.lock:
+            if self.set_version(fingerprint) and self.path is not None and os.path.exists(self.path):
+                self.load()
+
+    def load(self):
+        """
+        Loads the persisted entries if they were saved for the current dictionary.
+        """
+        with open(self.path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+
+        if data.get("version") != CACHE_FORMAT_VERSION or data.get("fingerprint") != self.fingerprint:
+            return
+        if self.max_size <= 0:
+            return
+
+        # Entries are stored from least to most recently used
+        for word, threshold, best_match, best_score in data["entries"][-self.max_size:]:
+            self.put((word, threshold), (best_match, best_score))
+
+    def save(self):
+        """
+        Writes the entries to the cache file, replacing it atomically.
+        """
+        if self.path is None:
+            raise ValueError("The correction cache has no file to save to")
+
+        with self.lock:
+            data = {
+                "version": CACHE_FORMAT_VERSION,
+                "fingerprint": self.fingerprint,
+                "entries": [[word, threshold, best_match, best_score]
+                            for (word, threshold), (best_match, best_score) in self.items()],
+            }
+
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(temp_path, self.path)
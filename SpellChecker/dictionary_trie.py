@@ -0,0 +1,284 @@
+import sys
+from array import array
+
+from .match_order import is_better_match, push_match, ranked_positions, required_score
+
+# Separates the words of DictionaryTrie.joined_words, dictionary words never contain it
+WORD_SEPARATOR = "\0"
+
+
+# Dictionary trie stored in flat arrays (one entry per node, no Python object per node)
+class DictionaryTrie:
+
+    # Initialization method
+    def __init__(self, words, max_search_distance=1):
+        """
+        Builds the trie from the dictionary words. Nodes are numbered in pre-order, so the first
+        child of a node (if any) is always the next node, and the remaining children are chained
+        through the sibling array in increasing character order.
+
+        :param words: dictionary words, their positions are used to break ties like a linear scan
+        :param max_search_distance: largest edit distance searched in the trie by best_match, a word that is
+                                    not resolved within it is looked up with a scan over the trie words
+        """
+        self.max_search_distance = max_search_distance
+
+        # The words in dictionary order for that scan, one string is much smaller than a list of strings
+        self.joined_words = WORD_SEPARATOR.join(words)
+
+        # Character code of the edge leading into each node
+        self.labels = array('I', [0])
+
+        # Parent and next sibling of each node (-1 when there is none)
+        self.parents = array('i', [-1])
+        self.siblings = array('i', [-1])
+
+        # Dictionary position of the word ending at each node (-1 for non terminal nodes)
+        self.positions = array('i', [-1])
+
+        # Length of the longest word below each node, used to bound the allowed edit distance
+        self.max_lengths = array('H', [0])
+
+        # Terminal node of each dictionary position
+        self.terminal_nodes = array('i', [0]) * len(words)
+
+        # Insert the words in sorted order so that shared prefixes are always on the current path
+        path = [0]
+        last_children = [-1]
+        previous = ""
+
+        for position in sorted(range(len(words)), key=words.__getitem__):
+            word = words[position]
+
+            # Keep the part of the path shared with the previous word
+            common = 0
+            while common < min(len(word), len(previous)) and word[common] == previous[common]:
+                common += 1
+
+            del path[common + 1:]
+            del last_children[common + 1:]
+
+            # Add the nodes for the remaining characters
+            for depth in range(common, len(word)):
+                node = len(self.labels)
+
+                self.labels.append(ord(word[depth]))
+                self.parents.append(path[depth])
+                self.siblings.append(-1)
+                self.positions.append(-1)
+                self.max_lengths.append(0)
+
+                if last_children[depth] != -1:
+                    self.siblings[last_children[depth]] = node
+                last_children[depth] = node
+
+                path.append(node)
+                last_children.append(-1)
+
+            # Mark the terminal node, duplicates keep the first position like the linear scan
+            terminal = path[len(word)]
+            if self.positions[terminal] == -1:
+                self.positions[terminal] = position
+            self.terminal_nodes[position] = terminal
+
+            for node in path:
+                if self.max_lengths[node] < len(word):
+                    self.max_lengths[node] = len(word)
+
+            previous = word
+
+    def __len__(self):
+        return len(self.terminal_nodes)
+
+    def __getitem__(self, position):
+        # Rebuild the word by walking up from its terminal node
+        node = self.terminal_nodes[position]
+        characters = []
+        while node > 0:
+            characters.append(chr(self.labels[node]))
+            node = self.parents[node]
+        return "".join(reversed(characters))
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def __contains__(self, word):
+        node = 0
+        for character in word:
+            node = self._child(node, ord(character))
+            if node == -1:
+                return False
+        return self.positions[node] != -1
+
+    def _first_child(self, node):
+        child = node + 1
+        if child < len(self.parents) and self.parents[child] == node:
+            return child
+        return -1
+
+    def _child(self, node, code):
+        child = self._first_child(node)
+        while child != -1 and self.labels[child] < code:
+            child = self.siblings[child]
+        if child != -1 and self.labels[child] == code:
+            return child
+        return -1
+
+    def memory_footprint(self):
+        """
+        Returns the number of bytes used by the trie arrays and the joined words.
+        """
+        node_arrays = (self.labels, self.parents, self.siblings, self.positions, self.max_lengths, self.terminal_nodes)
+        return (sys.getsizeof(self) + sum(sys.getsizeof(values) for values in node_arrays)
+                + sys.getsizeof(self.joined_words))
+
+    @staticmethod
+    def _allowed_distance(word_length, required_score, max_length):
+        """
+        Largest edit distance a word of at most max_length characters can have while its
+        normalized Levenshtein score still reaches required_score.
+        """
+        # A word needs at least (length - word_length) edits, so the longer words cannot reach the score at all
+        if required_score > 0:
+            max_length = min(max_length, int(word_length * 100 / required_score + 1e-9))
+        return int((1 - (required_score / 100)) * max(word_length, max_length) + 1e-9)
+
+    def _search(self, word, max_distance, minimum_score, visit):
+        """
+        Depth first traversal that computes one Levenshtein DP row per node and prunes a branch as soon
+        as the row minimum exceeds the allowed distance. visit(position) is called for every word within it.
+        minimum_score() is the score a word still needs, it is read again at every node.
+        """
+        codes = [ord(character) for character in word]
+        m = len(codes)
+
+        stack = []
+        first_child = self._first_child(0)
+        if first_child != -1:
+            stack.append((first_child, list(range(m + 1))))
+
+        while stack:
+            node, previous_row = stack.pop()
+
+            # The siblings share the parent row
+            sibling = self.siblings[node]
+            if sibling != -1:
+                stack.append((sibling, previous_row))
+
+            code = self.labels[node]
+            row = [previous_row[0] + 1]
+            for j in range(1, m + 1):
+                cost = 0 if codes[j - 1] == code else 1
+                row.append(min(row[j - 1] + 1, previous_row[j] + 1, previous_row[j - 1] + cost))
+
+            limit = min(max_distance, self._allowed_distance(m, minimum_score(), self.max_lengths[node]))
+
+            position = self.positions[node]
+            if position != -1 and row[m] <= limit:
+                visit(position)
+
+            child = self._first_child(node)
+            if child != -1 and min(row) <= limit:
+                stack.append((child, row))
+
+    def best_match(self, word, threshold, score_function):
+        """
+        Finds the best match of the linear scan (see is_better_match) in the trie.
+
+        The trie is searched with an increasing edit distance bound, and the search stops as soon as
+        no word further away can reach the best verified score. Every extra edit makes the search much
+        wider, so past max_search_distance the remaining words are scanned instead.
+
+        :param word: lowercase word to look up
+        :param threshold: minimum score (0 - 100) accepted as a match
+        :param score_function: normalized Levenshtein score function (word, dictionary_word) -> score
+        :return: (best_match, best_score), best_match is None when nothing reaches the threshold
+        """
+        m = len(word)
+        best = [None, 0]
+
+        # The empty word is only stored at the root
+        if self.positions[0] != -1:
+            score = score_function(word, "")
+            if score >= threshold and score > 0:
+                best = [self.positions[0], score]
+
+        def visit(position):
+            score = score_function(word, self[position])
+            if score >= threshold and is_better_match(score, position, best[1], best[0]):
+                best[0] = position
+                best[1] = score
+
+        max_distance = self._allowed_distance(m, threshold, self.max_lengths[0])
+        distance = 0
+        while True:
+            self._search(word, min(distance, max_distance), lambda: max(threshold, best[1]), visit)
+            if distance >= max_distance:
+                break
+
+            # Words more than `distance` edits away score at most m / (m + distance + 1)
+            unseen_score = (1 - ((distance + 1) / (m + distance + 1))) * 100
+            if best[0] is not None and best[1] > unseen_score + 1e-9:
+                break
+
+            if distance >= self.max_search_distance:
+                self._scan(word, threshold, score_function, best)
+                break
+            distance += 1
+
+        if best[0] is None:
+            return None, 0
+
+        return self[best[0]], best[1]
+
+    def _scan(self, word, threshold, score_function, best):
+        """
+        Scores every word like the linear scan, updating the [position, score] best match found so far.
+        """
+        for position, candidate in enumerate(self.joined_words.split(WORD_SEPARATOR)):
+            score = score_function(word, candidate)
+            if score >= threshold and is_better_match(score, position, best[1], best[0]):
+                best[0] = position
+                best[1] = score
+
+    def matches(self, word, k, threshold, score_function):
+        """
+        Returns the k best matches scoring at least the threshold, ordered like the ranking of a linear scan.
+        The trie is searched once, the allowed distance shrinks as the k best matches improve.
+
+        :return: list of (match, score), best first
+        """
+        heap = []
+
+        def visit(position):
+            score = score_function(word, self[position])
+            if score >= threshold:
+                push_match(heap, k, score, position)
+
+        if self.positions[0] != -1:
+            visit(self.positions[0])
+
+        max_distance = self._allowed_distance(len(word), threshold, self.max_lengths[0])
+        self._search(word, max_distance, lambda: required_score(heap, k, threshold), visit)
+
+        return [(self[position], score) for position, score in ranked_positions(heap)]
+
+
+def list_memory_footprint(words):
+    """
+    Returns the number of bytes used by a plain list of word strings.
+    """
+    return sys.getsizeof(words) + sum(sys.getsizeof(word) for word in words)
+
+
+if __name__ == "__main__":
+    # Report the memory footprint of the trie next to the plain dictionary list
+    with open("SpellChecker/corrected_sinhala_words.txt", 'r', encoding='utf-8') as file:
+        dictionary = list(dict.fromkeys(word.lower() for word in file.read().split(",")))
+
+    trie = DictionaryTrie(dictionary)
+
+    print(f"Words: {len(dictionary)}, trie nodes: {len(trie.labels)}")
+    print(f"List memory: {list_memory_footprint(dictionary) / 1024 / 1024:.2f} MB")
+    print(f"Trie memory: {trie.memory_footprint() / 1024 / 1024:.2f} MB")
@@ -0,0 +1,99 @@
+def bounded_levenshtein_distance(word1, word2, max_distance):
+    """
+    Levenshtein distance computed with Myers' bit-parallel algorithm over Python integers.
+
+    The distance in the last row changes by at most one per column, so the computation stops as soon as
+    the remaining columns can no longer bring it back under max_distance.
+
+    :param word1: first word
+    :param word2: second word
+    :param max_distance: largest distance of interest
+    :return: the exact distance when it is at most max_distance, otherwise max_distance + 1
+    """
+    m, n = len(word1), len(word2)
+
+    # The length difference alone already needs that many insertions or deletions
+    if abs(m - n) > max_distance:
+        return max_distance + 1
+    if m == 0 or n == 0:
+        return max(m, n)
+
+    # Bit mask of the positions of every character in word1
+    peq = {}
+    for i, character in enumerate(word1):
+        peq[character] = peq.get(character, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    last_bit = 1 << (m - 1)
+
+    # Vertical positive and negative deltas of the current column
+    pv = mask
+    mv = 0
+    distance = m
+
+    for j, character in enumerate(word2):
+        eq = peq.get(character, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+
+        # Horizontal positive and negative deltas
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+
+        if ph & last_bit:
+            distance += 1
+        elif mh & last_bit:
+            distance -= 1
+
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+
+        if distance - (n - j - 1) > max_distance:
+            return max_distance + 1
+
+    return distance if distance <= max_distance else max_distance + 1
+
+
+def bounded_longest_common_substring(word1, word2, min_length=0):
+    """
+    Length of the longest common substring computed row by row, abandoning the computation once no
+    substring of at least min_length characters can be completed in the remaining rows.
+
+    :param word1: first word
+    :param word2: second word
+    :param min_length: smallest length of interest
+    :return: the exact length when it is at least min_length, otherwise some value below min_length
+    """
+    m, n = len(word1), len(word2)
+    if min(m, n) < min_length:
+        return 0
+
+    prev = [0] * (n + 1)
+    curr = [0] * (n + 1)
+
+    max_len = 0
+
+    for i in range(1, m + 1):
+        character = word1[i - 1]
+        row_max = 0
+
+        for j in range(1, n + 1):
+            if character == word2[j - 1]:
+                curr[j] = prev[j - 1] + 1
+                if curr[j] > row_max:
+                    row_max = curr[j]
+            else:
+                curr[j] = 0
+
+        if row_max > max_len:
+            max_len = row_max
+
+        # Open substrings can grow by at most one character per remaining row
+        if max_len < min_length and row_max + (m - i) < min_length:
+            return max_len
+
+        prev, curr = curr, prev
+
+    return max_len
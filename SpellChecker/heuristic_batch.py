@@ -0,0 +1,123 @@
+import time
+from collections import Counter
+
+import numpy as np
+
+from .match_order import is_better_match
+
+
+# Batch scorer for the athulya heuristic over the whole dictionary
+class HeuristicBatchScorer:
+
+    # Initialization method
+    def __init__(self, words, score_function):
+        """
+        Precomputes a character histogram matrix of the dictionary, one column per word.
+
+        :param words: dictionary words, in the order the linear scan visits them
+        :param score_function: athulya heuristic (word, dictionary_word, cutoff) -> score
+        """
+        self.words = words
+        self.score_function = score_function
+
+        # Map every character of the dictionary to a histogram row
+        self.alphabet = {}
+        for word in words:
+            for character in word:
+                if character not in self.alphabet:
+                    self.alphabet[character] = len(self.alphabet)
+
+        # Histogram matrix stored as (characters x words) so each character row is contiguous
+        self.histograms = np.zeros((len(self.alphabet), len(words)), dtype=np.uint8)
+        for position, word in enumerate(words):
+            for character in word:
+                self.histograms[self.alphabet[character], position] += 1
+
+        self.lengths = np.array([len(word) for word in words], dtype=np.int32)
+
+    def common_letters(self, word):
+        """
+        Returns the size of the multiset intersection between the letters of the word and the letters of
+        every dictionary word, computed for the whole dictionary at once.
+        """
+        common = np.zeros(len(self.words), dtype=np.int32)
+        for character, count in Counter(word).items():
+            row = self.alphabet.get(character)
+            if row is not None:
+                common += np.minimum(self.histograms[row], count)
+        return common
+
+    def best_match(self, word, threshold):
+        """
+        Finds the best athulya heuristic match of the linear scan (see is_better_match) with score bounds.
+
+        The longest common substring can never be longer than the number of common letters, so
+        letter presence + common letters bounds the total score. Words whose bound cannot reach the
+        threshold are discarded before the exact heuristic runs, and the remaining ones are scored in
+        decreasing bound order until no bound can reach the best score found.
+
+        :param word: lowercase word to look up
+        :param threshold: minimum score (0 - 100) accepted as a match
+        :return: (best_match, best_score), best_match is None when nothing reaches the threshold
+        """
+        m = len(word)
+        if m == 0 or len(self.words) == 0:
+            return None, 0
+
+        # letter_presence_score adds one for every common letter and subtracts one for every letter left
+        # unmatched on either side, which is 3 * common - len(word1) - len(word2) for the whole dictionary
+        common = self.common_letters(word)
+        presence = 3 * common - m - self.lengths
+
+        # The arrangement score is only added when the letter presence score is not zero
+        total_bound = np.where(presence != 0, presence + common, 0)
+
+        # Score bound in integer arithmetic, with a one point margin against float rounding
+        bound = (total_bound + m) * 100 // (3 * m) + 1
+
+        positions = np.flatnonzero(bound >= threshold)
+        positions = positions[np.argsort(-bound[positions], kind="stable")]
+
+        best_position = None
+        best_score = 0
+
+        for position in positions.tolist():
+            if bound[position] < best_score:
+                break
+
+            score = self.score_function(word, self.words[position], max(threshold, best_score))
+            if score >= threshold and is_better_match(score, position, best_score, best_position):
+                best_position = position
+                best_score = score
+
+        if best_position is None:
+            return None, 0
+
+        return self.words[best_position], best_score
+
+
+def measure_throughput(best_match_function, tokens, threshold):
+    """
+    Returns the number of tokens per second scored by a best match function.
+    """
+    start = time.perf_counter()
+    for token in tokens:
+        best_match_function(token, threshold)
+    elapsed = time.perf_counter() - start
+
+    return len(tokens) / elapsed if elapsed > 0 else float("inf")
+
+
+if __name__ == "__main__":
+    from SpellChecker.spellchecker_heuristic import SpellCheck
+
+    # Compare the throughput of the batch scorer with the linear scan
+    tokens = ["මම", "ගියා", "කෑබට", "විරද්‍යාව", "තාක්ෂකය", "දීප්තිමමත්", "විභාගරයට", "ගගණන්"]
+
+    spell_check = SpellCheck("SpellChecker/corrected_sinhala_words.txt")
+    batch_spell_check = SpellCheck("SpellChecker/corrected_sinhala_words.txt", use_batch_scorer=True)
+
+    for threshold in (50, 70):
+        scan_rate = measure_throughput(spell_check.best_match, tokens, threshold)
+        batch_rate = measure_throughput(batch_spell_check.best_match, tokens, threshold)
+        print(f"Threshold {threshold}: scan {scan_rate:.2f} tokens/s, batch {batch_rate:.2f} tokens/s")
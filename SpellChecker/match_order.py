@@ -0,0 +1,38 @@
+import heapq
+
+
+def is_better_match(score, position, best_score, best_position):
+    """
+    Returns whether the dictionary word at position beats the best match found so far, in the order of the
+    linear scan over the dictionary: a higher score wins, and among equal scores the first word (lowest
+    position) is kept. The indexes visit words out of order and use this to return the same match as the scan.
+
+    :param best_position: position of the best match so far, None when there is none yet
+    """
+    if score > best_score:
+        return True
+    return best_position is not None and score == best_score and position < best_position
+
+
+def push_match(heap, k, score, position):
+    """
+    Adds a match to a min heap of (score, -position) that keeps the k best matches in linear scan order.
+    """
+    if len(heap) < k:
+        heapq.heappush(heap, (score, -position))
+    elif (score, -position) > heap[0]:
+        heapq.heapreplace(heap, (score, -position))
+
+
+def required_score(heap, k, threshold):
+    """
+    Returns the score a match needs to enter a heap of the k best matches, equal scores may still enter it.
+    """
+    return threshold if len(heap) < k else max(threshold, heap[0][0])
+
+
+def ranked_positions(heap):
+    """
+    Returns the (position, score) of the matches of a heap, best first.
+    """
+    return [(-negative_position, score) for score, negative_position in sorted(heap, reverse=True)]
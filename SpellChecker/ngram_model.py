@@ -0,0 +1,203 @@
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from common.staging_directory import replace_directory
+
+# Model directory layout, every array is a .npy file that is memory mapped when loading:
+#   meta.json         format version, number of tokens, words and bigrams
+#   unigram_keys      sorted uint64 hashes of the words, the position of a hash is the word id
+#   unigram_counts    uint32 count of every word id
+#   bigram_offsets    int64, the bigrams starting with word id i are in [offsets[i], offsets[i + 1])
+#   bigram_next       uint32 id of the second word of every bigram, sorted within each first word
+#   bigram_counts     uint32 count of every bigram
+VERSION = 1
+ARRAYS = ("unigram_keys", "unigram_counts", "bigram_offsets", "bigram_next", "bigram_counts")
+
+# Same words as the ones the spell checker corrects
+WORD_PATTERN = re.compile(r'[\w\'\u0D80-\u0DFF]+', re.UNICODE)
+
+
+def word_hash(word):
+    """
+    Stable 64 bit hash of a word. Two corpus words sharing a hash are counted as one word, which is
+    negligible at 64 bits.
+    """
+    return int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _corpus_sentences(corpus_file, tagged):
+    """
+    Yields the sentences of a corpus as lists of lowercase words.
+    """
+    if tagged:
+        from GrammarChecker.corpus_loader import iter_tagged_sentences
+
+        for sentence, _ in iter_tagged_sentences(corpus_file):
+            yield [word.lower() for word in WORD_PATTERN.findall(" ".join(sentence))]
+        return
+
+    with open(corpus_file, 'r', encoding='utf-8') as file:
+        for line in file:
+            yield [word.lower() for word in WORD_PATTERN.findall(line)]
+
+
+def build_ngram_model(corpus_file, model_dir, tagged=False):
+    """
+    Counts the unigrams and bigrams of a corpus and writes the model arrays.
+
+    :param corpus_file: UTF-8 text file with one sentence per line, bigrams do not cross line breaks
+    :param model_dir: directory the model files are written to, replaced as a whole
+    :param tagged: read the corpus_file as a POS tagged corpus with one "word tag" pair per line, such as
+                   GrammarChecker/POSTagDataset/tagged_sentences.txt, bigrams do not cross sentences
+    :return: (number of words, number of bigrams)
+    """
+    unigrams = Counter()
+    bigrams = Counter()
+
+    for words in _corpus_sentences(corpus_file, tagged):
+        unigrams.update(words)
+        bigrams.update(zip(words, words[1:]))
+
+    # Word ids follow the sorted hashes so a word is found with a binary search
+    hashes = {word: word_hash(word) for word in unigrams}
+    unigram_keys = np.array(sorted(set(hashes.values())), dtype=np.uint64)
+    word_ids = {word: int(np.searchsorted(unigram_keys, np.uint64(key))) for word, key in hashes.items()}
+
+    unigram_counts = np.zeros(len(unigram_keys), dtype=np.uint32)
+    for word, count in unigrams.items():
+        unigram_counts[word_ids[word]] += count
+
+    # Merge the bigrams of colliding words, then sort them by (first id, second id)
+    bigram_id_counts = Counter()
+    for (first, second), count in bigrams.items():
+        bigram_id_counts[(word_ids[first], word_ids[second])] += count
+
+    pairs = sorted(bigram_id_counts)
+    first_ids = np.array([first for first, _ in pairs], dtype=np.int64)
+    bigram_next = np.array([second for _, second in pairs], dtype=np.uint32)
+    bigram_counts = np.array([bigram_id_counts[pair] for pair in pairs], dtype=np.uint32)
+    bigram_offsets = np.searchsorted(first_ids, np.arange(len(unigram_keys) + 1)).astype(np.int64)
+
+    # The model is swapped in when complete, models memory mapped from the previous files stay valid
+    arrays = dict(zip(ARRAYS, (unigram_keys, unigram_counts, bigram_offsets, bigram_next, bigram_counts)))
+    with replace_directory(model_dir) as staging:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), array)
+
+        with open(os.path.join(staging, "meta.json"), 'w', encoding='utf-8') as file:
+            json.dump({"version": VERSION, "tokens": int(unigram_counts.sum(dtype=np.int64)),
+                       "words": len(unigram_keys), "bigrams": len(pairs)}, file)
+
+    return len(unigram_keys), len(pairs)
+
+
+# Read only unigram and bigram model backed by memory mapped arrays
+class NgramModel:
+
+    # Initialization method
+    def __init__(self, model_dir, interpolation=0.7):
+        """
+        :param model_dir: directory written by build_ngram_model
+        :param interpolation: weight of the bigram estimate against the unigram estimate
+        """
+        self.path = model_dir
+        self.interpolation = interpolation
+
+        with open(os.path.join(model_dir, "meta.json"), 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        if meta.get("version") != VERSION:
+            raise ValueError(f"{model_dir} is not an n-gram model of version {VERSION}")
+
+        self.tokens = meta["tokens"]
+        self.vocabulary_size = meta["words"]
+
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode='r'))
+
+    def word_id(self, word):
+        """
+        Returns the id of the word, or None when it is not in the corpus.
+        """
+        if self.vocabulary_size == 0:
+            return None
+
+        key = np.uint64(word_hash(word))
+        position = int(np.searchsorted(self.unigram_keys, key))
+        if position < self.vocabulary_size and self.unigram_keys[position] == key:
+            return position
+        return None
+
+    def unigram_count(self, word):
+        word_id = self.word_id(word)
+        return 0 if word_id is None else int(self.unigram_counts[word_id])
+
+    def bigram_count(self, first, second):
+        first_id = self.word_id(first)
+        second_id = self.word_id(second)
+        if first_id is None or second_id is None:
+            return 0
+        return self._bigram_count(first_id, second_id)
+
+    def _bigram_count(self, first_id, second_id):
+        start, end = int(self.bigram_offsets[first_id]), int(self.bigram_offsets[first_id + 1])
+        position = start + int(np.searchsorted(self.bigram_next[start:end], np.uint32(second_id)))
+        if position < end and self.bigram_next[position] == second_id:
+            return int(self.bigram_counts[position])
+        return 0
+
+    def log_probability(self, word, previous_word=None):
+        """
+        Log probability of the word after the previous word, interpolated with the add-one smoothed
+        unigram probability so unseen words and bigrams keep a small probability.
+        """
+        word_id = self.word_id(word)
+        count = 0 if word_id is None else int(self.unigram_counts[word_id])
+        probability = (count + 1) / (self.tokens + self.vocabulary_size + 1)
+
+        previous_id = None if previous_word is None else self.word_id(previous_word)
+        if previous_id is not None:
+            bigram = 0 if word_id is None else self._bigram_count(previous_id, word_id)
+            previous_count = int(self.unigram_counts[previous_id])
+            probability = (self.interpolation * bigram / previous_count
+                           + (1 - self.interpolation) * probability)
+
+        return math.log(probability)
+
+    def context_score(self, word, previous_word=None, next_word=None):
+        """
+        Log probability of the word between its neighbouring words.
+        """
+        score = self.log_probability(word, previous_word)
+        if next_word is not None:
+            score += self.log_probability(next_word, word)
+        return score
+
+    def rerank(self, candidates, previous_word=None, next_word=None):
+        """
+        Returns the candidate that fits the neighbouring words best, the earliest one on ties.
+        """
+        return max(candidates, key=lambda candidate: self.context_score(candidate, previous_word, next_word))
+
+    def memory_footprint(self):
+        return sum(getattr(self, name).nbytes for name in ARRAYS)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the unigram and bigram model used to rerank corrections")
+    parser.add_argument("corpus_file", help="UTF-8 text file with one sentence per line, see --tagged")
+    parser.add_argument("model_dir")
+    parser.add_argument("--tagged", action="store_true",
+                        help="read the corpus_file as a POS tagged corpus, such as the POS tagger dataset")
+    args = parser.parse_args()
+
+    words, bigrams = build_ngram_model(args.corpus_file, args.model_dir, args.tagged)
+    size = NgramModel(args.model_dir).memory_footprint()
+    print(f"Wrote {words} words and {bigrams} bigrams ({size / 1e6:.1f} MB) to {args.model_dir}")
@@ -1,31 +1,47 @@
 import re
 from tqdm import tqdm
 
+from .compiled_dictionary import CompiledDictionary, is_compiled_dictionary
+from .edit_kernels import bounded_longest_common_substring
+from .heuristic_batch import HeuristicBatchScorer
+
 
 # spellcheck main class
 class SpellCheck:
 
     # initialization method
-    def __init__(self, word_dict_file=None):
+    def __init__(self, word_dict_file=None, use_batch_scorer=False):
         self.string_to_check = None
 
-        # open the dictionary file
-        self.file = open(word_dict_file, 'r', encoding='utf-8')
+        if is_compiled_dictionary(word_dict_file):
+            # memory map the precompiled dictionary, the words are already normalized
+            self.dictionary = CompiledDictionary(word_dict_file)
+        else:
+            # open the dictionary file
+            self.file = open(word_dict_file, 'r', encoding='utf-8')
+
+            # load the file data in a variable
+            data = self.file.read()
+
+            # store all the words in a list
+            data = data.split(",")
 
-        # load the file data in a variable
-        data = self.file.read()
+            # change all the words to lowercase
+            data = [i.lower() for i in data]
 
-        # store all the words in a list
-        data = data.split(",")
+            # remove all the duplicates in the list
+            data = set(data)
 
-        # change all the words to lowercase
-        data = [i.lower() for i in data]
+            # store all the words into a class variable dictionary
+            self.dictionary = list(data)
 
-        # remove all the duplicates in the list
-        data = set(data)
+        # known words skip the fuzzy search, a plain list needs a set for O(1) membership checks
+        self.known_words = set(self.dictionary) if isinstance(self.dictionary, list) else self.dictionary
 
-        # store all the words into a class variable dictionary
-        self.dictionary = list(data)
+        # precompute the dictionary histograms for the vectorized scorer, if requested
+        self.batch_scorer = None
+        if use_batch_scorer:
+            self.batch_scorer = HeuristicBatchScorer(self.dictionary, self.athulya_heuristic)
 
     def letter_presence_score(self, word1, word2):
         letter_presence_score = 0
@@ -52,30 +68,14 @@ class SpellCheck:
 
         return letter_presence_score
 
-    def longest_common_substring_length(self, word1, word2):
-        m, n = len(word1), len(word2)
-
-        prev = [0] * (n + 1)
-        curr = [0] * (n + 1)
-
-        max_len = 0
-
-        for i in range(1, m + 1):
-            for j in range(1, n + 1):
-                if word1[i - 1] == word2[j - 1]:
-                    curr[j] = prev[j - 1] + 1
-                    max_len = max(max_len, curr[j])
-                else:
-                    curr[j] = 0
-
-            prev, curr = curr, prev
-
-        return max_len
+    def longest_common_substring_length(self, word1, word2, min_length=0):
+        # row by row kernel that stops once no substring of min_length can be completed
+        return bounded_longest_common_substring(word1, word2, min_length)
 
-    def letter_arrangement_score(self, word1, word2):
-        return self.longest_common_substring_length(word1, word2)
+    def letter_arrangement_score(self, word1, word2, min_length=0):
+        return self.longest_common_substring_length(word1, word2, min_length)
 
-    def athulya_heuristic(self, word1, word2):
+    def athulya_heuristic(self, word1, word2, cutoff=0):
         """
         scoring should,
             - add score for each common letter
@@ -84,6 +84,7 @@ class SpellCheck:
             - map from lowest possible score - highest possible score to 0 - 1
         :param word1: known word to compare
         :param word2: incorrect / reference word to compare
+        :param cutoff: scores below the cutoff are not needed exactly, only known to be below it
         :return: distance score
         """
 
@@ -98,13 +99,41 @@ class SpellCheck:
 
         letter_arrangement_score = 0
         if letter_presence_score != 0:
-            letter_arrangement_score = self.letter_arrangement_score(word1, word2)
+            # smallest arrangement score that can still reach the cutoff, with one point of slack for rounding
+            min_total_score = cutoff / 100 * (max_score - min_score) + min_score
+            min_length = int(min_total_score - letter_presence_score) - 1
+            letter_arrangement_score = self.letter_arrangement_score(word1, word2, min_length)
 
         total_score = letter_presence_score + letter_arrangement_score
         normalized_score = (total_score - min_score) / (max_score - min_score)
 
         return normalized_score * 100
 
+    # this method returns the best dictionary match of a word and its score
+    def best_match(self, word, threshold):
+        # a word that is already in the dictionary is its own best match
+        if word in self.known_words:
+            return word, self.athulya_heuristic(word, word)
+
+        # score the whole dictionary at once and skip the words that cannot reach the threshold
+        if self.batch_scorer is not None:
+            return self.batch_scorer.best_match(word, threshold)
+
+        best_match = None
+        best_score = 0
+
+        # loop over words in the dictionary
+        for name in self.dictionary:
+            # calculate the match score using athulya_heuristic, the cutoff tightens as the best score improves
+            score = self.athulya_heuristic(word, name, max(threshold, best_score))
+
+            # if the score is greater than the current best_score and above the threshold, update the best match
+            if score >= threshold and score > best_score:
+                best_match = name
+                best_score = score
+
+        return best_match, best_score
+
     # string setter method
     def check(self, string_to_check):
         # store the string to be checked in a class variable
@@ -120,18 +149,8 @@ class SpellCheck:
 
         # loop over the number of words in the string to be checked
         for i in range(len(string_words)):
-            best_match = None
-            best_score = 0
-
-            # loop over words in the dictionary
-            for name in self.dictionary:
-                # calculate the match score using athulya_heuristic
-                score = self.athulya_heuristic(string_words[i].lower(), name.lower())
-
-                # if the score is greater than the current best_score, update the best match
-                if score >= 50 and score > best_score:  # Lowered threshold for better flexibility
-                    best_match = name
-                    best_score = score
+            # find the best dictionary match using athulya_heuristic
+            best_match, _ = self.best_match(string_words[i].lower(), 50)  # Lowered threshold for better flexibility
 
             # if a valid suggestion is found (best_match is not None), append it to the list
             if best_match:
@@ -152,18 +171,8 @@ class SpellCheck:
         for token in tqdm(tokens, "Correcting words: "):
             # Check if the token is a word (not punctuation or whitespace)
             if re.match(r'[\w\'\u0D80-\u0DFF]+', token, re.UNICODE):  # Match Sinhala and other Unicode words
-                best_match = None
-                best_score = 0
-
-                # Loop over the words in the dictionary
-                for name in self.dictionary:
-                    # Calculate the match probability using athulya_heuristic
-                    score = self.athulya_heuristic(token.lower(), name.lower())
-
-                    # If the score is greater than the current best_score and above the threshold
-                    if score >= 70 and score > best_score:  # Lowered threshold for better flexibility
-                        best_match = name
-                        best_score = score
+                # Find the best dictionary match using athulya_heuristic
+                best_match, _ = self.best_match(token.lower(), 70)  # Lowered threshold for better flexibility
 
                 # If a valid best match is found, update the token
                 if best_match:
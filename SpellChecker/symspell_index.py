@@ -0,0 +1,170 @@
+from array import array
+from collections import defaultdict
+
+import numpy as np
+
+from .match_order import is_better_match, push_match, ranked_positions, required_score
+
+
+# Symmetric deletion (SymSpell style) candidate index
+class DeletionIndex:
+
+    # Initialization method
+    def __init__(self, words, max_edit_distance=2, prefix_length=7):
+        """
+        Precomputes every deletion variant (up to max_edit_distance characters removed) of the prefix of
+        every dictionary word, so that candidates for a token can be found by lookups instead of a full
+        dictionary scan.
+
+        The variants are stored as sorted 64-bit hashes pointing into one array of word positions. With the
+        default settings the 101k word Sinhala dictionary has 1.03M variants and builds in about 4 s into
+        27 MB of arrays (130 MB peak). Indexing whole words instead gave 3.26M variants, 12 s and 830 MB.
+
+        :param words: dictionary words, in the order the linear scan visits them
+        :param max_edit_distance: largest edit distance resolved through the index
+        :param prefix_length: number of leading characters of a word whose deletion variants are indexed,
+                              longer words share more variants and get more candidates to verify
+        """
+        self.words = words
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+
+        # (variant hash, word position) pairs, the positions of a word come in increasing order
+        keys = array('q')
+        positions = array('i')
+
+        # Group word positions by length for the bounded fallback scan
+        self.positions_by_length = defaultdict(list)
+
+        for position, word in enumerate(words):
+            self.positions_by_length[len(word)].append(position)
+            for variant in self._deletes(word[:prefix_length]):
+                keys.append(hash(variant))
+                positions.append(position)
+
+        # Sort the pairs by hash, the positions of a hash stay in dictionary order
+        keys = np.frombuffer(keys, dtype=np.int64)
+        order = np.argsort(keys, kind='stable')
+        self.keys, starts = np.unique(keys[order], return_index=True)
+        self.offsets = np.append(starts, len(order))
+        self.positions = np.frombuffer(positions, dtype=np.int32)[order]
+
+    def _deletes(self, word):
+        """
+        Returns the word itself together with every string obtained by deleting up to
+        max_edit_distance of its characters.
+        """
+        variants = {word}
+        frontier = {word}
+
+        for _ in range(self.max_edit_distance):
+            next_frontier = set()
+            for variant in frontier:
+                for i in range(len(variant)):
+                    next_frontier.add(variant[:i] + variant[i + 1:])
+
+            next_frontier -= variants
+            variants |= next_frontier
+            frontier = next_frontier
+
+        return variants
+
+    def candidates(self, word):
+        """
+        Returns the positions of all dictionary words whose prefix shares a deletion variant with the prefix
+        of the word. Every word within max_edit_distance of the given word is guaranteed to be included:
+        the prefixes of two words within k edits are also within k deletions of a common string. Hash
+        collisions only add candidates.
+        """
+        hashes = [hash(variant) for variant in self._deletes(word[:self.prefix_length])]
+        slots = np.searchsorted(self.keys, hashes)
+
+        positions = set()
+        for slot, key in zip(slots.tolist(), hashes):
+            if slot < len(self.keys) and self.keys[slot] == key:
+                positions.update(self.positions[self.offsets[slot]:self.offsets[slot + 1]].tolist())
+        return positions
+
+    def _score_upper_bound(self, word_length, candidate_length):
+        """
+        Upper bound of the normalized Levenshtein score for a dictionary word of the given length
+        that was not returned by candidates(), i.e. one that is at least max_edit_distance + 1 edits away.
+        """
+        min_distance = max(self.max_edit_distance + 1, abs(word_length - candidate_length))
+        max_len = max(word_length, candidate_length)
+        if max_len == 0:
+            return 0
+        return (1 - (min_distance / max_len)) * 100
+
+    def best_match(self, word, threshold, score_function):
+        """
+        Finds the best match of the linear scan (see is_better_match) through the deletion index.
+
+        Candidates are generated by hash lookups and verified with score_function. Only when a word
+        beyond max_edit_distance could still beat the verified result are the word lengths that can
+        reach it scanned as well.
+
+        :param word: lowercase word to look up
+        :param threshold: minimum score (0 - 100) accepted as a match
+        :param score_function: normalized Levenshtein score function (word, dictionary_word) -> score
+        :return: (best_match, best_score), best_match is None when nothing reaches the threshold
+        """
+        best_position = None
+        best_score = 0
+
+        # Verify the candidates found through the index
+        verified = self.candidates(word)
+        for position in verified:
+            score = score_function(word, self.words[position])
+            if score >= threshold and is_better_match(score, position, best_score, best_position):
+                best_position = position
+                best_score = score
+
+        # Scan only the word lengths where an unverified word could still reach the current best
+        required_score = max(threshold, best_score)
+        for length, positions in self.positions_by_length.items():
+            if self._score_upper_bound(len(word), length) + 1e-9 < required_score:
+                continue
+
+            for position in positions:
+                if position in verified:
+                    continue
+
+                score = score_function(word, self.words[position])
+                if score >= threshold and is_better_match(score, position, best_score, best_position):
+                    best_position = position
+                    best_score = score
+
+        if best_position is None:
+            return None, 0
+
+        return self.words[best_position], best_score
+
+    def matches(self, word, k, threshold, score_function):
+        """
+        Returns the k best matches scoring at least the threshold, ordered like the ranking of a linear scan.
+        Word lengths are only scanned beyond the verified candidates while they can still enter the k best.
+
+        :return: list of (match, score), best first
+        """
+        heap = []
+
+        verified = self.candidates(word)
+        for position in verified:
+            score = score_function(word, self.words[position])
+            if score >= threshold:
+                push_match(heap, k, score, position)
+
+        for length, positions in self.positions_by_length.items():
+            if self._score_upper_bound(len(word), length) + 1e-9 < required_score(heap, k, threshold):
+                continue
+
+            for position in positions:
+                if position in verified:
+                    continue
+
+                score = score_function(word, self.words[position])
+                if score >= threshold:
+                    push_match(heap, k, score, position)
+
+        return [(self.words[position], score) for position, score in ranked_positions(heap)]
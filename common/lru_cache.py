@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+
+
+# Thread safe bounded LRU cache that counts its hits, misses and evictions
+class LRUCache:
+
+    # Initialization method
+    def __init__(self, max_size=10000):
+        """
+        :param max_size: maximum number of entries, 0 disables the cache
+        """
+        self.max_size = max_size
+        self.version = None
+        self.entries = OrderedDict()
+
+        # A cache may be shared by several threads
+        self.lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def set_version(self, version):
+        """
+        Binds the cache to the version of what its values are computed from, entries of another version are dropped.
+
+        :return: whether the version changed
+        """
+        with self.lock:
+            if version == self.version:
+                return False
+
+            self.entries.clear()
+            self.version = version
+            return True
+
+    def get(self, key):
+        """
+        Returns the cached value of the key, or None on a miss.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+
+            # Evict the least recently used entries
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def items(self):
+        """
+        Returns the (key, value) entries from the least to the most recently used.
+        """
+        with self.lock:
+            return list(self.entries.items())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
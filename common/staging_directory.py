@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def replace_directory(path):
+    """
+    Yields a new directory next to path to write into, which replaces the directory at path once the block
+    completes. Readers never see a half written directory, the previous one stays in place until the swap.
+    The files of the previous directory are moved away and deleted rather than overwritten, so arrays still
+    memory mapped from them, for example by the model being saved, stay valid.
+
+    :param path: directory to replace, created when it does not exist. Everything in it is replaced.
+    """
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+
+    staging = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=parent)
+    try:
+        yield staging
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if os.path.exists(path):
+        retired = f"{staging}.old"
+        os.replace(path, retired)
+        os.replace(staging, path)
+        shutil.rmtree(retired, ignore_errors=True)
+    else:
+        os.replace(staging, path)
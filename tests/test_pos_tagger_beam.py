@@ -0,0 +1,24 @@
+import pytest
+
+from GrammarChecker.POSTagger_HMC import POSTagger
+
+SENTENCES = [["මම", "ගෙදර", "යමි"], ["අපි", "බත්", "කමු"], ["ඔහු", "ඉක්මනින්", "පාසලට", "යයි"], ["මම", "බත්", "කමි"]]
+TAGS = [["PRP", "NNC", "VFM"], ["PRP", "NNC", "VFM"], ["PRP", "RB", "NNC", "VFM"], ["PRP", "NNC", "VFM"]]
+TEST_SENTENCES = [["මම", "ඉක්මනින්", "ගෙදර", "යමි"], ["අපි", "පාසලට", "zzq"]]
+
+
+@pytest.mark.parametrize("options", [{"beam_width": 0}, {"beam_width": -2}, {"beam_threshold": -1.0}])
+def test_invalid_beam_is_rejected(options):
+    with pytest.raises(ValueError):
+        POSTagger(**options)
+
+
+def test_beam_wider_than_the_tag_set_decodes_exactly():
+    exact = POSTagger()
+    exact.train(SENTENCES, TAGS)
+    wide = POSTagger(beam_width=100)
+    wide.train(SENTENCES, TAGS)
+
+    assert [wide.predict(sentence) for sentence in TEST_SENTENCES] == \
+        [exact.predict(sentence) for sentence in TEST_SENTENCES]
+    assert wide.predict_batch(TEST_SENTENCES) == exact.predict_batch(TEST_SENTENCES)
@@ -0,0 +1,53 @@
+import json
+import os
+
+from GrammarChecker.POSTagger_HMC import POSTagger
+from GrammarChecker.corpus_loader import CorpusStatistics, TaggedCorpus, load_corpus_cache, save_corpus_cache
+from SpellChecker.ngram_model import NgramModel, build_ngram_model
+
+SENTENCES = [["මම", "ගෙදර", "යමි"], ["අපි", "බත්", "කමු"], ["ඔහු", "පාසලට", "යයි"], ["මම", "බත්", "කමි"]]
+TAGS = [["PRP", "NNC", "VFM"], ["PRP", "NNC", "VFM"], ["PRP", "NNC", "VFM"], ["PRP", "NNC", "VFM"]]
+
+
+def tagged_corpus(sentences, tags):
+    return TaggedCorpus(sentences, tags, CorpusStatistics.from_sentences(sentences, tags))
+
+
+def test_loaded_tagger_snapshot_can_be_saved_over_itself(tmp_path):
+    path = str(tmp_path / "snapshot")
+    tagger = POSTagger()
+    tagger.train(SENTENCES, TAGS)
+    tagger.save(path)
+
+    loaded = POSTagger.load(path)
+    expected = loaded.predict(["මම", "පාසලට", "යමි"])
+    loaded.save(path)
+
+    assert POSTagger.load(path).predict(["මම", "පාසලට", "යමි"]) == expected
+    assert loaded.predict(["මම", "පාසලට", "යමි"]) == expected
+    assert sorted(os.listdir(tmp_path)) == ["snapshot"]
+
+
+def test_corpus_cache_overwrite_replaces_every_file(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    save_corpus_cache(tagged_corpus(SENTENCES, TAGS), cache_dir, "first")
+    save_corpus_cache(tagged_corpus(SENTENCES[:2], TAGS[:2]), cache_dir, "second")
+
+    assert load_corpus_cache(cache_dir, "first") is None
+    assert load_corpus_cache(cache_dir, "second").sentences == SENTENCES[:2]
+
+
+def test_ngram_model_rebuild_keeps_the_loaded_model_valid(tmp_path):
+    corpus = tmp_path / "corpus.txt"
+    model_dir = str(tmp_path / "model")
+    corpus.write_text("මම ගෙදර යමි\nඅපි බත් කමු\n", encoding='utf-8')
+    build_ngram_model(str(corpus), model_dir)
+    model = NgramModel(model_dir)
+    tokens = model.tokens
+
+    corpus.write_text("මම ගෙදර යමි\n", encoding='utf-8')
+    build_ngram_model(str(corpus), model_dir)
+
+    assert model.unigram_counts.sum() == tokens
+    with open(os.path.join(model_dir, "meta.json"), 'r', encoding='utf-8') as file:
+        assert json.load(file)["tokens"] == 3
@@ -0,0 +1,39 @@
+from SpellChecker.SpellCheckerByLevenshteinEditDistance import SpellCheck
+
+DICTIONARY = ["මම", "ගෙදර", "යමි", "අපි", "බත්", "කමු", "පාසලට", "යනවා"]
+TEXT = "මම ගෙදරා යමී. අපි බත කමූ, පාසලට යනව."
+
+
+def test_parallel_calls_reuse_the_worker_pool():
+    with SpellCheck(dictionary=DICTIONARY, parallel_min_words=0) as spell_check:
+        expected = spell_check.correct(TEXT)
+
+        assert spell_check.correct(TEXT, workers=2) == expected
+        pool = spell_check._worker_pool(2)
+
+        assert spell_check.correct_many([TEXT, TEXT], workers=2) == [expected, expected]
+        assert "".join(spell_check.correct_stream([TEXT[:9], TEXT[9:]], workers=2)) == expected
+        assert spell_check._worker_pool(2) is pool
+
+
+def test_dictionary_change_replaces_the_worker_pool():
+    with SpellCheck(dictionary=DICTIONARY, parallel_min_words=0) as spell_check:
+        spell_check.correct(TEXT, workers=2)
+        pool = spell_check._worker_pool(2)
+
+        spell_check.add_words(["යනව"])
+        assert spell_check._worker_pool(2) is not pool
+        assert spell_check.correct(TEXT, workers=2) == spell_check.correct(TEXT)
+
+
+def test_small_inputs_are_corrected_without_workers():
+    with SpellCheck(dictionary=DICTIONARY) as spell_check:
+        spell_check.correct(TEXT, workers=2)
+        assert spell_check._pools == {}
+
+
+def test_progress_bar_counts_the_unique_words(capsys):
+    with SpellCheck(dictionary=DICTIONARY, parallel_min_words=0) as spell_check:
+        spell_check.correct(TEXT, workers=2, show_progress=True)
+
+    assert "8/8" in capsys.readouterr().err
@@ -0,0 +1,74 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from tokenizers import Tokenizer, models, pre_tokenizers, trainers
+
+from GrammarChecker.xlmr_tagger import XLMRPOSTagger
+
+SENTENCES = [["මම", "ගෙදර", "යමි"], ["අපි", "බත්", "කමු"], ["ඔහු", "ඉක්මනින්", "පාසලට", "යයි"],
+             ["මම", "ඊයේ", "උද්‍යානයට", "ගියා", "ළමයි", "ටිකක්", "පැසිපන්දු", "ක්‍රීඩා", "කරනවා", "දැක්කා"],
+             ["එදා", "අලුත්", "යාලුවො", "ගැන", "මට", "ලොකු", "සතුටක්", "දැනුනා"]]
+LABELS = ["NNC", "PRP", "RB", "VFM", "JJ", "POST"]
+
+# Padding partner, much longer than the other sentences
+LONG_SENTENCE = [word for sentence in SENTENCES for word in sentence] * 2
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    """Tiny randomly initialised tagger, built offline. The wider initialisation makes its tags depend on the
+    context, so attending to padding changes them."""
+    path = tmp_path_factory.mktemp("xlmr")
+    special_tokens = ["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+
+    tokenizer = Tokenizer(models.BPE(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Metaspace()
+    tokenizer.train_from_iterator((" ".join(sentence) for sentence in SENTENCES),
+                                  trainers.BpeTrainer(vocab_size=200, special_tokens=special_tokens))
+    tokenizer = transformers.PreTrainedTokenizerFast(tokenizer_object=tokenizer, bos_token="<s>", eos_token="</s>",
+                                                     pad_token="<pad>", unk_token="<unk>", cls_token="<s>",
+                                                     sep_token="</s>", mask_token="<mask>")
+
+    config = transformers.XLMRobertaConfig(vocab_size=len(tokenizer), hidden_size=32, num_hidden_layers=2,
+                                           num_attention_heads=2, intermediate_size=64, max_position_embeddings=130,
+                                           num_labels=len(LABELS), id2label=dict(enumerate(LABELS)),
+                                           label2id={label: i for i, label in enumerate(LABELS)},
+                                           pad_token_id=tokenizer.pad_token_id, initializer_range=0.2)
+    torch.manual_seed(0)
+    transformers.XLMRobertaForTokenClassification(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return str(path)
+
+
+def test_batched_predictions_equal_single_sentences(model_dir):
+    pos_tagger = XLMRPOSTagger(model_dir, batch_size=2)
+    expected = [pos_tagger.predict(sentence) for sentence in SENTENCES]
+
+    assert pos_tagger.predict_batch(SENTENCES + [[]]) == expected + [[]]
+    assert [len(tags) for tags in expected] == [len(sentence) for sentence in SENTENCES]
+
+
+@pytest.mark.parametrize("padding_side", ["right", "left"])
+def test_padding_does_not_leak_into_short_sentences(model_dir, padding_side):
+    pos_tagger = XLMRPOSTagger(model_dir, batch_size=len(SENTENCES))
+    pos_tagger.tokenizer.padding_side = padding_side
+
+    for sentence in SENTENCES:
+        assert pos_tagger.predict_batch([sentence, LONG_SENTENCE])[0] == pos_tagger.predict(sentence)
+
+
+def test_words_past_the_maximum_length_are_unknown(model_dir):
+    pos_tagger = XLMRPOSTagger(model_dir, max_length=6)
+    tags = pos_tagger.predict(SENTENCES[3])
+
+    assert len(tags) == len(SENTENCES[3])
+    assert tags[-1] == "UNK" and tags[0] in LABELS
+
+
+def test_the_tagger_leaves_the_torch_thread_count_alone(model_dir):
+    threads = torch.get_num_threads()
+    XLMRPOSTagger(model_dir)
+
+    assert torch.get_num_threads() == threads